@@ -0,0 +1,222 @@
+import argparse
+import sys
+
+from SMO import benchmark, distribution, network
+from SMO.replication import compare, modes, replicate, metrics
+from SMO.sequential import default_metrics, estimate, names
+from SMO.runner import report, report_network, resume, run_headless, run_network
+from SMO.sweep import grid, sweep
+
+
+def add_system_arguments(p):
+    p.add_argument("--sources", type=int, default=5)
+    p.add_argument("--buffer", type=int, default=10)
+    p.add_argument("--devices", type=int, default=56)
+    p.add_argument("--limit", type=int, default=1000)
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--interval", type=parse_interval, default=0.25, help="source interval or distribution spec")
+    p.add_argument("--service", type=parse_service, default=(0.25, 1.0), help="service scale,shift or distribution spec")
+    p.add_argument("--streams", action="store_true", help="draw variates from per-entity NumPy streams")
+    p.add_argument(
+        "--warmup", type=int, nargs="?", const=True, default=False, metavar="N",
+        help="detect the warm-up period (MSER) and discard it, optionally after at least N observations"
+    )
+
+
+def parse_service(s):
+    if ":" in s:
+        return distribution.parse(s)
+    return tuple(float(x) for x in s.split(","))
+
+
+def parse_interval(s):
+    if ":" in s:
+        return distribution.parse(s)
+    return float(s)
+
+
+def fallback(hint=None):
+    def report(why):
+        print("falling back to the Python event loop: %s%s" % (why, "; " + hint if hint else ""), file=sys.stderr)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m SMO")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("run", help="run a single simulation without GUI")
+    add_system_arguments(p)
+    p.add_argument("--events", default=None, help="stream the event log to a .bin or .csv file")
+    p.add_argument("--no-kernel", dest="accelerate", action="store_false", help="disable the compiled kernel")
+    p.add_argument("--instrument", action="store_true", help="count events and sample phase timings")
+    p.add_argument("--quantiles", type=float, nargs="+", default=[], metavar="P",
+                   help="track system-time quantiles with P2 sketches (e.g. 0.95 0.99)")
+    p.add_argument("--checkpoint", default=None, help="periodically save the full simulation state to this file")
+    p.add_argument("--checkpoint-every", type=int, default=1000000, help="events between checkpoints")
+
+    p = commands.add_parser("resume", help="continue a run from a checkpoint file")
+    p.add_argument("path")
+    p.add_argument("--no-kernel", dest="accelerate", action="store_false", help="disable the compiled kernel")
+    p.add_argument("--checkpoint", default=None, help="keep checkpointing to this file (e.g. the same path)")
+    p.add_argument("--checkpoint-every", type=int, default=1000000, help="events between checkpoints")
+
+    p = commands.add_parser("network", help="run a multi-stage network described by a JSON file")
+    p.add_argument("spec", help='e.g. {"sources": 5, "routes": 0, "stages": [{"buffer": 10, "devices": 4, "route": 1}, ...]}')
+    p.add_argument("--limit", type=int, default=1000)
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--streams", action="store_true", help="draw variates from per-entity NumPy streams")
+
+    p = commands.add_parser("replicate", help="run independent replications on a process pool")
+    add_system_arguments(p)
+    p.add_argument("--replications", type=int, default=10)
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--level", type=float, default=0.9)
+    p.add_argument("--mode", choices=modes, default="independent")
+
+    p = commands.add_parser("compare", help="compare two configurations with paired replications")
+    add_system_arguments(p)
+    p.add_argument("--sources-b", type=int, default=None)
+    p.add_argument("--buffer-b", type=int, default=None)
+    p.add_argument("--devices-b", type=int, default=None)
+    p.add_argument("--replications", type=int, default=10)
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--level", type=float, default=0.9)
+    p.add_argument("--mode", choices=modes, default="crn")
+
+    p = commands.add_parser("estimate", help="extend one run until the batch-means confidence intervals are tight")
+    add_system_arguments(p)
+    p.set_defaults(limit=10 ** 9)
+    p.add_argument("--metrics", nargs="+", choices=names, default=list(default_metrics))
+    p.add_argument("--precision", type=float, default=0.05, help="target half-width relative to the mean")
+    p.add_argument("--absolute", action="store_true", help="treat --precision as an absolute half-width")
+    p.add_argument("--level", type=float, default=0.95)
+    p.add_argument("--batch", type=int, default=1000, help="packages per batch")
+    p.add_argument("--min-batches", type=int, default=10)
+
+    p = commands.add_parser("bench", help="run the benchmark suite and compare against a baseline")
+    p.add_argument("--only", nargs="+", choices=list(benchmark.suite()), default=None)
+    p.add_argument("--quick", action="store_true", help="run every benchmark at a tenth of its time budget and size")
+    p.add_argument("--output", default=None, help="save the results as JSON")
+    p.add_argument("--baseline", default=None, help="JSON results to compare against")
+    p.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown")
+
+    p = commands.add_parser("sweep", help="run a resumable parameter sweep over a configuration grid")
+    p.add_argument("--sources", type=int, nargs="+", default=[5])
+    p.add_argument("--buffer", type=int, nargs="+", default=[10])
+    p.add_argument("--devices", type=int, nargs="+", default=[56])
+    p.add_argument("--limit", type=int, nargs="+", default=[1000])
+    p.add_argument("--interval", type=parse_interval, nargs="+", default=[0.25])
+    p.add_argument("--service", type=parse_service, nargs="+", default=[(0.25, 1.0)])
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--replications", type=int, default=1)
+    p.add_argument("--workers", type=int, default=None)
+    p.add_argument("--level", type=float, default=0.9)
+    p.add_argument("--output", default="sweep.npz")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        system, events, elapsed = run_headless(
+            args.sources, args.buffer, args.devices, args.limit, args.seed, args.events, args.accelerate,
+            warmup=args.warmup, instrument=args.instrument, path=args.checkpoint, every=args.checkpoint_every,
+            interval=args.interval, service=args.service, streams=args.streams, quantiles=tuple(args.quantiles),
+            fallback=fallback(None if args.streams else "pass --streams to use the compiled kernel")
+        )
+        report(system, events, elapsed)
+    if args.command == "resume":
+        system, events, elapsed = resume(
+            args.path, args.accelerate, args.checkpoint, args.checkpoint_every, fallback()
+        )
+        report(system, events, elapsed)
+    if args.command == "network":
+        model = network.load(args.spec, args.seed, args.streams)
+        events, elapsed = run_network(model, args.limit)
+        report_network(model, events, elapsed)
+    if args.command == "replicate":
+        samples, estimates = replicate(
+            args.sources, args.buffer, args.devices, args.limit,
+            args.replications, args.seed, args.workers, args.level, args.mode,
+            warmup=args.warmup, interval=args.interval, service=args.service, streams=args.streams
+        )
+        print("%16s %12s %12s %25s" % ("Metric", "Mean", "s^2", "%.0f%% CI" % (args.level * 100)))
+        for m in metrics:
+            e = estimates[m]
+            print("%16s %12.5f %12.5g   [%10.5f, %10.5f]" % ((m, e.mean, e.variance) + e.interval()))
+        print("")
+        print("Replications:    %s" % len(samples))
+        print("Events:          %s" % sum(s["events"] for s in samples))
+    if args.command == "compare":
+        a = dict(
+            sources=args.sources, buffer=args.buffer, devices=args.devices, limit=args.limit,
+            warmup=args.warmup, interval=args.interval, service=args.service, streams=args.streams
+        )
+        b = dict(a)
+        for name in ("sources", "buffer", "devices"):
+            if getattr(args, name + "_b") is not None:
+                b[name] = getattr(args, name + "_b")
+        samples_a, samples_b, differences = compare(
+            a, b, args.replications, args.seed, args.workers, args.level, args.mode
+        )
+        print("%16s %12s %12s %12s %25s" % ("Metric", "A", "B", "A - B", "%.0f%% CI" % (args.level * 100)))
+        for m in metrics:
+            e = differences[m]
+            print("%16s %12.5f %12.5f %12.5f   [%10.5f, %10.5f]" % ((
+                m,
+                sum(s[m] for s in samples_a) / len(samples_a),
+                sum(s[m] for s in samples_b) / len(samples_b),
+                e.mean
+            ) + e.interval()))
+        print("")
+        print("Mode:            %s" % args.mode)
+        print("Replications:    %s + %s" % (len(samples_a), len(samples_b)))
+    if args.command == "estimate":
+        system, rule, estimates = estimate(
+            args.sources, args.buffer, args.devices, args.seed, args.limit, args.metrics,
+            args.precision, args.level, args.batch, args.min_batches, not args.absolute, args.warmup,
+            interval=args.interval, service=args.service, streams=args.streams
+        )
+        print("%16s %12s %12s %25s" % ("Metric", "Mean", "Half-width", "%.0f%% CI" % (args.level * 100)))
+        for m in args.metrics:
+            e = estimates[m]
+            print("%16s %12.5f %12.5g   [%10.5f, %10.5f]" % ((m, e.mean, e.half_width()) + e.interval()))
+        print("")
+        if system.warmup is not None:
+            print("Warm-up end:     %.5f (%s batches discarded)" % (system.warmup, rule.truncated))
+        print("Batches:         %s" % len(rule.batches))
+        print("Packages:        %s" % system.b.packages)
+        print("Converged:       %s" % rule.satisfied())
+    if args.command == "bench":
+        def progress(name, r):
+            if r["kind"] == "micro":
+                print("%36s %14.1f ns/op" % (name, r["ns_per_op"]))
+            else:
+                print("%36s %14.0f events/s %10.1f MiB peak" % (name, r["events_per_sec"], r["peak_bytes"] / 2 ** 20))
+
+        results = benchmark.run_suite(args.only, args.quick, progress)
+        if args.output:
+            benchmark.save(results, args.output)
+        if args.baseline:
+            rows = benchmark.compare(results, benchmark.load(args.baseline), args.tolerance)
+            print("")
+            print("%36s %14s %14s %8s" % ("Benchmark", "Baseline", "Current", "Ratio"))
+            for name, base, current, ratio, slower in rows:
+                print("%36s %14.1f %14.1f %8.3f%s" % (name, base, current, ratio, "  REGRESSION" if slower else ""))
+            if any(r[-1] for r in rows):
+                sys.exit(1)
+    if args.command == "sweep":
+        configs = grid(
+            sources=args.sources, buffer=args.buffer, devices=args.devices,
+            limit=args.limit, interval=args.interval, service=args.service
+        )
+
+        def progress(done, total, row):
+            print("[%s/%s] sources=%s buffer=%s devices=%s drop_rate=%.5f usage_rate=%.5f" % (
+                done, total, row["sources"], row["buffer"], row["devices"], row["drop_rate"], row["usage_rate"]
+            ))
+
+        sweep(configs, args.output, args.replications, args.seed, args.workers, args.level, progress)
+        print("Saved %s points to %s" % (len(configs), args.output))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+import json
+import platform
+import time
+import tracemalloc
+
+from SMO import kernel
+from SMO.buffer import Buffer
+from SMO.device import DeviceController, Status
+from SMO.runner import run
+from SMO.source import Source
+from SMO.system import System
+
+macros = {
+    "small": dict(ss=5, bs=10, ds=56, limit=20000),
+    "wide": dict(ss=500, bs=50, ds=56, limit=20000),
+    "deep": dict(ss=5, bs=10000, ds=10, limit=40000),
+    "small-streams": dict(ss=5, bs=10, ds=56, limit=20000, streams=True),
+}
+
+
+def best(f, n, repeat=5):
+    r = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f(n)
+        r.append(time.perf_counter() - start)
+    return min(r)
+
+
+def calibrate(f, n, budget):
+    # Grow n until a single run takes at least budget seconds, so that timer
+    # resolution and scheduler noise stay small against the measured time.
+    while True:
+        start = time.perf_counter()
+        f(n)
+        if time.perf_counter() - start >= budget:
+            return n
+        n *= 2
+
+
+def micro(f, n, budget=0.2, repeat=5):
+    n = calibrate(f, n, budget)
+    return {"kind": "micro", "ops": n, "ns_per_op": best(f, n, repeat) / n * 1e9}
+
+
+def bench_tick(n, budget):
+    system = System(5, 10, 56, seed=1)
+    system.logging = False
+    system.fast_forward = True
+    system.reset(10 ** 9)
+    tick = system.tick
+
+    def f(n):
+        for _ in range(n):
+            tick()
+    return micro(f, n, budget)
+
+
+def full_buffer(size, sources):
+    b = Buffer(size)
+    for i in range(size):
+        b.add(b.pool.acquire(sources[i % len(sources)], float(i)))
+    return b
+
+
+def bench_buffer_add(n, budget):
+    sources = [Source(i) for i in range(8)]
+    b = full_buffer(64, sources)
+
+    def f(n):
+        add = b.add
+        acquire = b.pool.acquire
+        for i in range(n):
+            add(acquire(sources[i % 8], float(i)))
+    return micro(f, n, budget)
+
+
+def bench_buffer_pick(n, budget):
+    sources = [Source(i) for i in range(8)]
+    b = full_buffer(64, sources)
+
+    def f(n):
+        add = b.add
+        pick = b.pick
+        pool = b.pool
+        for i in range(n):
+            pool.release(pick(float(i)))
+            add(pool.acquire(sources[i % 8], float(i)))
+    return micro(f, n, budget)
+
+
+def busy_devices(size, ready=1):
+    dc = DeviceController(size)
+    free = {size - 1 - i * size // ready for i in range(ready)}
+    for d in dc.devices:
+        if d.id not in free:
+            d.status = Status.BUSY
+            d.eta = 1.0 + d.id
+            dc.update(d)
+    return dc
+
+
+def bench_device_min(n, budget):
+    dc = busy_devices(56)
+
+    def f(n):
+        m = dc.min
+        for _ in range(n):
+            m()
+    return micro(f, n, budget)
+
+
+def bench_select_free_device(n, budget, size, ready):
+    dc = busy_devices(size, ready)
+    pointers = [i * 7919 % size for i in range(1024)]
+
+    def f(n):
+        select = dc.select_free_device
+        for i in range(n):
+            dc.pointer = pointers[i & 1023]
+            select()
+    return micro(f, n, budget)
+
+
+def bench_device_update(n, budget, size):
+    dc = busy_devices(size, size // 2)
+    devices = [d for d in dc.devices if d.status == Status.READY]
+
+    def f(n):
+        update = dc.update
+        for i in range(n):
+            d = devices[i % len(devices)]
+            d.status = Status.BUSY
+            d.eta = 1.0 + i
+            update(d)
+            d.status = Status.READY
+            update(d)
+    return micro(f, n, budget)
+
+
+def logged_system():
+    system = System(5, 10, 56, seed=1)
+    system.fast_forward = True
+    system.reset(3000)
+    system.run_events()
+    return system
+
+
+def bench_graph(name, n, budget):
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+
+    system = logged_system()
+    figure = Figure(figsize=(10, 5), dpi=100)
+    graph = getattr(system, name)
+    end = system.t / 2
+
+    def f(n):
+        for _ in range(n):
+            figure.clf()
+            graph(figure.add_subplot(111), end - 10, end)
+    return micro(f, n, budget)
+
+
+def bench_renderer_frame(n, budget):
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    from SMO.renderer import Renderer
+
+    system = logged_system()
+    figure = Figure(figsize=(10, 5), dpi=100)
+    renderer = Renderer(figure, FigureCanvasAgg(figure))
+    snapshots = [system.snapshot(t, t + 10) for t in range(10, 110)]
+    renderer.draw(snapshots[0])
+
+    def f(n):
+        for i in range(n):
+            renderer.draw(snapshots[i % len(snapshots)])
+    return micro(f, n, budget)
+
+
+def bench_macro(ss, bs, ds, limit, repeat=5, **kwargs):
+    def build():
+        system = System(ss, bs, ds, 1, **kwargs)
+        system.logging = False
+        system.fast_forward = True
+        return system
+
+    events, elapsed = run(build(), limit)
+    for _ in range(repeat - 1):
+        e, t = run(build(), limit)
+        elapsed = min(elapsed, t)
+
+    tracemalloc.start()
+    run(build(), limit)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "kind": "macro",
+        "events": events,
+        "seconds": elapsed,
+        "events_per_sec": events / elapsed if elapsed > 0 else 0.0,
+        "peak_bytes": peak,
+    }
+
+
+def suite(quick=False):
+    k = 10 if quick else 1
+    budget = 0.2 / k
+    return {
+        "tick": lambda: bench_tick(1000, budget),
+        "buffer_add": lambda: bench_buffer_add(1000, budget),
+        "buffer_pick": lambda: bench_buffer_pick(1000, budget),
+        "device_min": lambda: bench_device_min(1000, budget),
+        **{
+            "select_free_device_D%d_ready%d" % (size, ready):
+                (lambda size=size, ready=ready: bench_select_free_device(1000, budget, size, ready))
+            for size, ready in ((56, 1), (56, 28), (1000, 10), (100000, 100))
+        },
+        **{
+            "device_update_D%d" % size: (lambda size=size: bench_device_update(1000, budget, size))
+            for size in (56, 1000, 100000)
+        },
+        "graph_device": lambda: bench_graph("graph_device", 2, budget),
+        "graph_buffer": lambda: bench_graph("graph_buffer", 2, budget),
+        "graph_queue": lambda: bench_graph("graph_queue", 2, budget),
+        "renderer_frame": lambda: bench_renderer_frame(2, budget),
+        **{
+            "run_" + name: (lambda config=config: bench_macro(**dict(config, limit=config["limit"] // k)))
+            for name, config in macros.items()
+        },
+    }
+
+
+def run_suite(names=None, quick=False, progress=None):
+    benchmarks = suite(quick)
+    results = {}
+    for name in names or benchmarks:
+        results[name] = benchmarks[name]()
+        if progress:
+            progress(name, results[name])
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "kernel": kernel.available(),
+        "quick": quick,
+        "benchmarks": results,
+    }
+
+
+def save(results, path):
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+
+
+def load(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def score(r):
+    if r["kind"] == "micro":
+        return 1e9 / r["ns_per_op"]
+    return r["events_per_sec"]
+
+
+def compare(results, baseline, tolerance=0.25):
+    rows = []
+    for name, r in results["benchmarks"].items():
+        base = baseline["benchmarks"].get(name)
+        if base is None or base["kind"] != r["kind"]:
+            continue
+        ratio = score(r) / score(base)
+        rows.append((name, score(base), score(r), ratio, ratio < 1 - tolerance))
+    return rows
@@ -1,10 +1,16 @@
+import bisect
+import heapq
 import sys
+from collections import deque
+
+from SMO.package import PackagePool
 
 
 class Buffer:
     def __init__(self, size):
         self.size = size
-        self.queue = []
+        self.pool = PackagePool(size)
+        self.queue = deque()
         self.data = [None for _ in range(size)]
         self.pointer = 0
         self.min = sys.maxsize
@@ -13,8 +19,16 @@ class Buffer:
         self.accepted = 0
         self.dropped = 0
 
+        self.free = list(range(size))
+        self.slots = {}
+        self.counts = {}
+        self.ids_min = []
+        self.ids_max = []
+        self.in_min = set()
+        self.in_max = set()
+
     def reset(self):
-        self.queue = []
+        self.queue = deque()
         self.data = [None for _ in range(self.size)]
         self.pointer = 0
         self.min = sys.maxsize
@@ -23,103 +37,120 @@ class Buffer:
         self.accepted = 0
         self.dropped = 0
 
-    def select_min(self):
-        r = []
-        for i in range(self.size):
-            if self.data[i]:
-                if self.data[i][1]:
-                    if self.data[i][0][0].id == self.min:
-                        r += [True]
-                    else:
-                        r += [False]
-                else:
-                    r += [False]
-            else:
-                r += [False]
-        return r
-
-    def select_max(self):
-        r = []
-        for i in range(self.size):
-            if self.data[i]:
-                if self.data[i][1]:
-                    if self.data[i][0][0].id == self.max:
-                        r += [True]
-                    else:
-                        r += [False]
-                else:
-                    r += [False]
-            else:
-                r += [False]
-        return r
+        self.free = list(range(self.size))
+        self.slots = {}
+        self.counts = {}
+        self.ids_min = []
+        self.ids_max = []
+        self.in_min = set()
+        self.in_max = set()
+
+    def mark(self):
+        return self.packages, self.accepted, self.dropped
+
+    def truncate(self, mark):
+        self.packages -= mark[0]
+        self.accepted -= mark[1]
+        self.dropped -= mark[2]
+
+    def insert(self, index, package):
+        id = package.source.id
+        self.data[index] = package
+
+        if id in self.slots:
+            bisect.insort(self.slots[id], index)
+        else:
+            self.slots[id] = [index]
+
+        self.counts[id] = self.counts.get(id, 0) + 1
+        if id not in self.in_min:
+            self.in_min.add(id)
+            heapq.heappush(self.ids_min, id)
+        if id not in self.in_max:
+            self.in_max.add(id)
+            heapq.heappush(self.ids_max, -id)
+        self.update_minmax()
+
+    def clear(self, index):
+        id = self.data[index].source.id
+        self.data[index] = None
+        self.counts[id] -= 1
+        self.update_minmax()
 
     def add(self, package):
         self.packages += 1
         self.accepted += 1
 
-        def insert(index):
-            self.data[index] = [package, True]
-            self.update_minmax()
-
-        for i in range(self.size):
-            if not self.data[i]:
-                insert(i)
-                return True, package[0].id
+        if self.free:
+            self.insert(heapq.heappop(self.free), package)
+            return True, package.source.id
 
-        end = self.pointer
-        is_min = self.select_min()
         self.dropped += 1
-        while True:
-            if is_min[self.pointer]:
-                id = self.data[self.pointer][0][0].id
-                dt = package[1] - self.data[self.pointer][0][1]
-                self.data[self.pointer][0][0].add_buffer_time(dt)
-                self.data[self.pointer][0][0].add_system_time(dt)
-                self.data[self.pointer][0][0].dropped += 1
-
-                insert(self.pointer)
-                return False, id
-
-            self.pointer += 1
-            if self.pointer == self.size:
-                self.pointer = 0
-
-            if self.pointer == end:
-                package[0].dropped += 1
-                self.accepted -= 1
-                return False, -1
+        slots = self.slots.get(self.min)
+        if not slots:
+            package.source.dropped += 1
+            self.accepted -= 1
+            self.pool.release(package)
+            return False, -1
+
+        i = bisect.bisect_left(slots, self.pointer)
+        if i == len(slots):
+            i = 0
+        self.pointer = slots.pop(i)
+
+        r = self.data[self.pointer]
+        source = r.source
+        dt = package.t - r.t
+        source.add_buffer_time(dt)
+        source.add_system_time(dt)
+        source.dropped += 1
+
+        self.clear(self.pointer)
+        self.pool.release(r)
+        self.insert(self.pointer, package)
+        return False, source.id
 
     def pick(self, t):
-        def pick_queue():
-            i = self.queue[0]
-            self.queue = self.queue[1:]
-
-            r = self.data[i][0]
-            self.data[i] = None
-            self.update_minmax()
-
-            r[0].add_buffer_time(t - r[1])
-            return r
+        if not self.queue:
+            slots = self.slots.get(self.max)
+            if not slots:
+                return None
 
-        if self.queue:
-            return pick_queue()
+            self.slots[self.max] = []
+            for i in slots:
+                self.data[i].queued = True
+            self.queue.extend(slots)
 
-        is_max = self.select_max()
-        for i in range(self.size):
-            if is_max[i]:
-                self.queue += [i]
-                self.data[i][1] = False
+        i = self.queue.popleft()
+        r = self.data[i]
+        self.clear(i)
+        heapq.heappush(self.free, i)
 
-        if not self.queue:
-            return None
+        r.source.add_buffer_time(t - r.t)
+        return r
 
-        return pick_queue()
+    def rebuild(self):
+        self.free = [i for i, r in enumerate(self.data) if r is None]
+        self.slots = {}
+        self.counts = {}
+        for i, r in enumerate(self.data):
+            if r is None:
+                continue
+            id = r.source.id
+            self.counts[id] = self.counts.get(id, 0) + 1
+            if not r.queued:
+                self.slots.setdefault(id, []).append(i)
+        self.ids_min = sorted(self.counts)
+        self.ids_max = sorted(-id for id in self.counts)
+        self.in_min = set(self.counts)
+        self.in_max = set(self.counts)
+        self.update_minmax()
 
     def update_minmax(self):
-        self.min = sys.maxsize
-        self.max = -1
+        while self.ids_min and self.counts[self.ids_min[0]] == 0:
+            self.in_min.discard(heapq.heappop(self.ids_min))
+        while self.ids_max and self.counts[-self.ids_max[0]] == 0:
+            self.in_max.discard(-heapq.heappop(self.ids_max))
 
-        for i in range(self.size):
-            if self.data[i]:
-                self.min = min(self.min, self.data[i][0][0].id)
-                self.max = max(self.min, self.data[i][0][0].id)
+        self.min = self.ids_min[0] if self.ids_min else sys.maxsize
+        self.max = -self.ids_max[0] if self.ids_max else -1
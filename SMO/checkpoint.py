@@ -0,0 +1,38 @@
+import os
+import pickle
+
+from SMO import kernel
+
+magic = b"SMOCKPT1"
+
+
+def dumps(system):
+    return magic + pickle.dumps(system, pickle.HIGHEST_PROTOCOL)
+
+
+def loads(data):
+    if data[:len(magic)] != magic:
+        raise ValueError("Not an SMO checkpoint")
+    return pickle.loads(data[len(magic):])
+
+
+def save(system, path):
+    data = dumps(system)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as file:
+        file.write(data)
+    os.replace(tmp, path)
+    return len(data)
+
+
+def load(path):
+    with open(path, "rb") as file:
+        return loads(file.read())
+
+
+def run(system, path, every=1000000, accelerate=True):
+    events = 0
+    while system.running:
+        events += kernel.run_events(system, every) if accelerate else system.run_events(every)
+        save(system, path)
+    return events
@@ -1,6 +1,8 @@
 from enum import Enum
-import random
-from numpy import exp
+
+from SMO.schedule import Schedule
+from SMO.distribution import as_service, per_entity
+from SMO.variate import Variates
 
 device_status_string = (
     "Busy",
@@ -16,8 +18,12 @@ class Status(Enum):
 
 
 class Device:
-    def __init__(self, id):
+    __slots__ = ("id", "service", "stream", "c", "t", "dt", "tt", "eta", "package", "status", "since")
+
+    def __init__(self, id, service=(0.25, 1.0)):
         self.id = id
+        self.service = as_service(service)
+        self.stream = None
         self.c = 0
         self.t = 0.0
         self.dt = 0.0
@@ -25,6 +31,7 @@ class Device:
         self.eta = 0.0
         self.package = None
         self.status = Status.READY
+        self.since = 0.0
 
     def reset(self):
         self.c = 0
@@ -34,10 +41,22 @@ class Device:
         self.eta = 0.0
         self.package = None
         self.status = Status.READY
+        self.since = 0.0
+
+    def mark(self, t):
+        return self.c, self.tt + ((t - self.t) if self.status == Status.BUSY else 0.0)
+
+    def truncate(self, mark, t):
+        self.c -= mark[0]
+        self.tt -= mark[1]
+        self.since = t
 
     def process(self, package):
         #self.dt = exp(random.random())
-        self.dt = exp(random.random() * 0.25 + 1.0)
+        if self.stream is not None:
+            self.dt = self.stream()
+        else:
+            self.dt = self.service.sample()
         self.eta = self.t + self.dt
         self.package = package
         self.status = Status.BUSY
@@ -46,26 +65,109 @@ class Device:
         self.c += 1
         self.t = self.eta
         self.tt += self.dt
-        self.package[0].add_processing_time(self.dt)
-        self.package[0].add_system_time(self.t - self.package[1])
+        self.package.source.add_processing_time(self.dt)
+        self.package.source.add_system_time(self.t - self.package.t)
         self.package = None
         self.status = Status.READY
 
     def usage_rate(self):
-        return self.tt / self.t
+        return self.tt / (self.t - self.since)
 
 
-class DeviceController:
+class ReadySet:
+    # Min segment tree over device ids: add, discard and the round-robin
+    # successor lookup all stay O(log D) however many devices there are.
     def __init__(self, size):
-        self.devices = [Device(i) for i in range(size)]
+        self.size = 1
+        while self.size < size:
+            self.size *= 2
+        self.tree = [self.size] * (2 * self.size)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, i):
+        return self.tree[self.size + i] == i
+
+    def add(self, i):
+        tree = self.tree
+        j = self.size + i
+        if tree[j] == i:
+            return
+        tree[j] = i
+        self.count += 1
+        j >>= 1
+        while j and tree[j] > i:
+            tree[j] = i
+            j >>= 1
+
+    def discard(self, i):
+        tree = self.tree
+        j = self.size + i
+        if tree[j] != i:
+            return
+        v = tree[j] = self.size
+        self.count -= 1
+        while j > 1:
+            s = tree[j ^ 1]
+            if s < v:
+                v = s
+            j >>= 1
+            if tree[j] != i:
+                break
+            tree[j] = v
+
+    def next(self, i):
+        tree = self.tree
+        none = self.size
+        j = none + i
+        if tree[j] == i:
+            return i
+        while j > 1:
+            if not j & 1 and tree[j + 1] != none:
+                return tree[j + 1]
+            j >>= 1
+        return tree[1] if tree[1] != none else -1
+
+
+class DeviceController:
+    def __init__(self, size, service=(0.25, 1.0)):
+        self.devices = [Device(i, s) for i, s in enumerate(per_entity(service, size))]
         self.t = 0.0
         self.pointer = 0
+        self.ready = ReadySet(len(self.devices))
+        self.schedule = Schedule()
+        self.update_schedule()
 
     def reset(self):
         self.t = 0.0
         self.pointer = 0
         for d in self.devices:
             d.reset()
+        self.update_schedule()
+
+    def set_streams(self, generators, block=256):
+        for d, g in zip(self.devices, generators):
+            d.stream = Variates(g, d.service.block, block)
+
+    def update_schedule(self):
+        self.schedule.reset()
+        self.ready = ReadySet(len(self.devices))
+        for d in self.devices:
+            self.update(d)
+
+    def update(self, device):
+        if device.status == Status.BUSY:
+            self.schedule.push(device, device.eta, device.id)
+            self.ready.discard(device.id)
+            return
+
+        self.ready.add(device.id)
+        if device.status == Status.READY:
+            self.schedule.push(device, device.t, device.id)
+        else:
+            self.schedule.remove(device)
 
     def __iter__(self):
         return self
@@ -74,36 +176,23 @@ class DeviceController:
         return len(self.devices)
 
     def select_free_device(self):
-        start = self.pointer
-        while True:
-            r = self.devices[self.pointer]
-            if r.status != Status.BUSY:
-                self.t = r.t
-                return r
-
-            self.pointer += 1
-            if self.pointer == len(self.devices):
-                self.pointer = 0
-
-            if self.pointer == start:
-                return None
+        i = self.ready.next(self.pointer)
+        if i < 0:
+            return None
+        self.pointer = i
+        r = self.devices[i]
+        self.t = r.t
+        return r
 
     def min(self):
-        timings = {}
-        for d in self.devices:
-            if d.status == Status.BUSY:
-                timings[d] = d.eta
-            if d.status == Status.READY:
-                timings[d] = d.t
-        if not timings:
-            return None
-        return min(timings, key=timings.get)
+        r = self.schedule.peek()
+        return r[0] if r else None
 
     def list_work_time(self):
         return [d.tt for d in self.devices]
 
     def list_work_rate(self):
-        return [(d.tt / d.t) if (d.t > 0) else 0.0 for d in self.devices]
+        return [(d.tt / (d.t - d.since)) if (d.t > d.since) else 0.0 for d in self.devices]
 
     def sum_work_time(self):
         return sum((d.tt for d in self.devices))
@@ -111,6 +200,9 @@ class DeviceController:
     def list_working(self):
         return [d for d in self.devices if d.status == Status.BUSY]
 
+    def busy(self):
+        return len(self.devices) - len(self.ready)
+
     def list_status(self):
         return [device_status_string[d.status.value] for d in self.devices]
 
@@ -124,13 +216,8 @@ class DeviceController:
         return ['o' if i == self.pointer else '' for i in range(len(self.devices))]
 
     def __next__(self):
-        m = self.min()
-        if m:
-            if m.status == Status.BUSY:
-                r = (m, m.eta)
-            else:
-                r = (m, m.t)
-        else:
+        r = self.schedule.peek()
+        if not r:
             r = (None, self.t)
         self.t = r[1]
         return r
@@ -0,0 +1,207 @@
+import bisect
+import random
+
+import numpy as np
+from numpy import exp
+
+
+class Distribution:
+    def sample(self):
+        raise NotImplementedError
+
+    def block(self, generator, n):
+        raise NotImplementedError
+
+    def mean(self):
+        raise NotImplementedError
+
+
+class Deterministic(Distribution):
+    def __init__(self, value):
+        self.value = float(value)
+
+    def __repr__(self):
+        return "Deterministic(%r)" % self.value
+
+    def sample(self):
+        return self.value
+
+    def block(self, generator, n):
+        return np.full(n, self.value)
+
+    def mean(self):
+        return self.value
+
+
+class Exponential(Distribution):
+    def __init__(self, mean):
+        self.m = float(mean)
+
+    def __repr__(self):
+        return "Exponential(%r)" % self.m
+
+    def sample(self):
+        return random.expovariate(1.0 / self.m)
+
+    def block(self, generator, n):
+        return generator.exponential(self.m, n)
+
+    def mean(self):
+        return self.m
+
+
+class Erlang(Distribution):
+    def __init__(self, k, mean):
+        self.k = int(k)
+        self.m = float(mean)
+
+    def __repr__(self):
+        return "Erlang(%r, %r)" % (self.k, self.m)
+
+    def sample(self):
+        return random.gammavariate(self.k, self.m / self.k)
+
+    def block(self, generator, n):
+        return generator.gamma(self.k, self.m / self.k, n)
+
+    def mean(self):
+        return self.m
+
+
+class HyperExponential(Distribution):
+    def __init__(self, probabilities, means):
+        if len(probabilities) != len(means):
+            raise ValueError("HyperExponential needs one mean per phase probability")
+        total = float(sum(probabilities))
+        self.probabilities = tuple(p / total for p in probabilities)
+        self.means = tuple(float(m) for m in means)
+        self.cumulative = np.cumsum(self.probabilities)
+        self.cumulative[-1] = 1.0
+        self.scales = np.array(self.means)
+
+    def __repr__(self):
+        return "HyperExponential(%r, %r)" % (self.probabilities, self.means)
+
+    def sample(self):
+        i = bisect.bisect_right(self.cumulative, random.random())
+        return random.expovariate(1.0 / self.means[min(i, len(self.means) - 1)])
+
+    def block(self, generator, n):
+        phases = np.searchsorted(self.cumulative, generator.random(n), side="right")
+        np.minimum(phases, len(self.means) - 1, out=phases)
+        return generator.exponential(1.0, n) * self.scales[phases]
+
+    def mean(self):
+        return sum(p * m for p, m in zip(self.probabilities, self.means))
+
+
+class ExpUniform(Distribution):
+    def __init__(self, scale, shift):
+        self.scale = float(scale)
+        self.shift = float(shift)
+
+    def __repr__(self):
+        return "ExpUniform(%r, %r)" % (self.scale, self.shift)
+
+    def sample(self):
+        return exp(random.random() * self.scale + self.shift)
+
+    def block(self, generator, n):
+        return np.exp(generator.random(n) * self.scale + self.shift)
+
+    def mean(self):
+        if self.scale == 0:
+            return float(np.exp(self.shift))
+        return float((np.exp(self.scale + self.shift) - np.exp(self.shift)) / self.scale)
+
+
+class Empirical(Distribution):
+    def __init__(self, values, weights=None, name=None):
+        self.values = np.asarray(values, dtype=np.float64)
+        if not len(self.values):
+            raise ValueError("Empirical distribution needs at least one value")
+        if weights is None:
+            weights = np.ones(len(self.values))
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.name = name
+        self.probability, self.alias = alias_table(self.weights)
+        self.table = (self.values.tolist(), self.probability.tolist(), self.values[self.alias].tolist())
+
+    @classmethod
+    def from_file(cls, path):
+        return cls(np.loadtxt(path, dtype=np.float64, ndmin=1), name=str(path))
+
+    def __repr__(self):
+        if self.name:
+            return "Empirical(%r)" % self.name
+        return "Empirical(<%s values>)" % len(self.values)
+
+    def sample(self):
+        values, probability, alias = self.table
+        u = random.random() * len(values)
+        i = int(u)
+        return values[i] if u - i < probability[i] else alias[i]
+
+    def block(self, generator, n):
+        u = generator.random(n) * len(self.values)
+        i = u.astype(np.intp)
+        return np.where(u - i < self.probability[i], self.values[i], self.values[self.alias[i]])
+
+    def mean(self):
+        return float(np.average(self.values, weights=self.weights))
+
+
+def alias_table(weights):
+    n = len(weights)
+    scaled = np.asarray(weights, dtype=np.float64) * n / np.sum(weights)
+    probability = np.ones(n)
+    alias = np.arange(n)
+
+    small = [i for i in range(n) if scaled[i] < 1.0]
+    large = [i for i in range(n) if scaled[i] >= 1.0]
+    while small and large:
+        s = small.pop()
+        l = large.pop()
+        probability[s] = scaled[s]
+        alias[s] = l
+        scaled[l] -= 1.0 - scaled[s]
+        if scaled[l] < 1.0:
+            small.append(l)
+        else:
+            large.append(l)
+
+    return probability, alias
+
+
+def parse(spec):
+    name, _, args = spec.partition(":")
+    name = name.strip().lower()
+    if name == "empirical":
+        return Empirical.from_file(args)
+
+    values = [float(x) for x in args.split(",") if x.strip()]
+    if name in ("det", "deterministic"):
+        return Deterministic(*values)
+    if name in ("exp", "exponential", "poisson"):
+        return Exponential(*values)
+    if name == "erlang":
+        return Erlang(*values)
+    if name in ("hyperexp", "hyperexponential"):
+        return HyperExponential(values[0::2], values[1::2])
+    if name in ("expu", "expuniform"):
+        return ExpUniform(*values)
+    raise ValueError("Unknown distribution: %s" % spec)
+
+
+def per_entity(value, n):
+    if isinstance(value, list):
+        if len(value) != n:
+            raise ValueError("Expected %s per-entity values, got %s" % (n, len(value)))
+        return value
+    return [value] * n
+
+
+def as_service(value):
+    if isinstance(value, Distribution):
+        return value
+    return ExpUniform(*value)
@@ -0,0 +1,164 @@
+import bisect
+from array import array
+from enum import IntEnum
+
+import numpy as np
+
+
+class Event(IntEnum):
+    GENERATE = 0
+    PLACE = 1
+    DROP = 2
+    CHANGE = 3
+    QUEUE = 4
+    BUSY = 5
+    READY = 6
+
+
+event_string = (
+    ("S", "Generating."),
+    ("B", "Placed package."),
+    ("B", "Dropped package."),
+    ("B", "Changed package."),
+    ("Q", None),
+    ("D", "Busy."),
+    ("D", "Ready."),
+)
+
+
+def format_event(event, t, source, value):
+    prefix, text = event_string[event]
+    if event == Event.QUEUE:
+        return "Q0 | %.4f | %s" % (t, value)
+    if event == Event.BUSY or event == Event.READY:
+        return "%s%s | %.4f | %s" % (prefix, source, t, [int(value), text])
+    return "%s%s | %.4f | %s" % (prefix, source, t, text)
+
+
+class BusyIntervals:
+    def __init__(self):
+        self.start = []
+        self.end = []
+        self.source = []
+        self.open = []
+
+    def reset(self):
+        self.start = []
+        self.end = []
+        self.source = []
+        self.open = []
+
+    def __len__(self):
+        return len(self.open)
+
+    def extend(self, device):
+        while len(self.open) <= device:
+            self.start.append(array('d'))
+            self.end.append(array('d'))
+            self.source.append(array('i'))
+            self.open.append(None)
+
+    def busy(self, device, t, source):
+        if device >= len(self.open):
+            self.extend(device)
+        if self.open[device] is None:
+            self.open[device] = (t, source)
+
+    def ready(self, device, t):
+        if device >= len(self.open) or self.open[device] is None:
+            return
+        start, source = self.open[device]
+        self.start[device].append(start)
+        self.end[device].append(t)
+        self.source[device].append(source)
+        self.open[device] = None
+
+    def window(self, device, start, end, now):
+        if device >= len(self.open):
+            return []
+        starts = self.start[device]
+        ends = self.end[device]
+        lo = bisect.bisect_left(ends, start)
+        hi = bisect.bisect_right(starts, end)
+        r = [(i, starts[i], ends[i], self.source[device][i]) for i in range(lo, hi)]
+        if self.open[device] is not None and self.open[device][0] <= end:
+            r.append((len(starts), self.open[device][0], now, self.open[device][1]))
+        return r
+
+
+class EventLog:
+    def __init__(self, capacity=1024):
+        self.capacity = capacity
+        self.size = 0
+        self.event = np.empty(capacity, dtype=np.int8)
+        self.t = np.empty(capacity, dtype=np.float64)
+        self.source = np.empty(capacity, dtype=np.int32)
+        self.value = np.empty(capacity, dtype=np.int32)
+        self.intervals = BusyIntervals()
+
+    def reset(self):
+        self.size = 0
+        self.intervals.reset()
+
+    def __len__(self):
+        return self.size
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        for name in ("event", "t", "source", "value"):
+            state[name] = state[name][:self.size]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.capacity = max(self.size, 1024)
+        for name in ("event", "t", "source", "value"):
+            column = state[name]
+            r = np.empty(self.capacity, dtype=column.dtype)
+            r[:self.size] = column
+            setattr(self, name, r)
+
+    def grow(self):
+        self.capacity *= 2
+        for name in ("event", "t", "source", "value"):
+            column = getattr(self, name)
+            r = np.empty(self.capacity, dtype=column.dtype)
+            r[:self.size] = column[:self.size]
+            setattr(self, name, r)
+
+    def append(self, event, t, source, value=-1):
+        if self.size == self.capacity:
+            self.grow()
+        i = self.size
+        self.event[i] = event
+        self.t[i] = t
+        self.source[i] = source
+        self.value[i] = value
+        self.size = i + 1
+
+        if event == Event.BUSY:
+            self.intervals.busy(value, t, source)
+        elif event == Event.READY:
+            self.intervals.ready(value, t)
+
+    def columns(self, start=0, end=None):
+        end = self.size if end is None else min(end, self.size)
+        return self.event[start:end], self.t[start:end], self.source[start:end], self.value[start:end]
+
+    def bounds(self, start, end):
+        t = self.t[:self.size]
+        return int(np.searchsorted(t, start, 'left')), int(np.searchsorted(t, end, 'right'))
+
+    def window(self, start, end):
+        return self.columns(*self.bounds(start, end))
+
+    def nbytes(self):
+        return self.size * (self.event.itemsize + self.t.itemsize + self.source.itemsize + self.value.itemsize)
+
+    def __iter__(self):
+        for i in range(self.size):
+            yield int(self.event[i]), float(self.t[i]), int(self.source[i]), int(self.value[i])
+
+    def lines(self):
+        for e in self:
+            yield format_event(*e)
@@ -0,0 +1,108 @@
+import numpy as np
+
+from SMO.eventlog import EventLog
+
+magic = b"SMOLOG1\0"
+
+record = np.dtype([
+    ("event", np.int8),
+    ("t", np.float64),
+    ("source", np.int32),
+    ("value", np.int32),
+])
+
+
+class Sink:
+    def __init__(self, path, chunk=65536):
+        self.path = path
+        self.chunk = np.empty(chunk, dtype=record)
+        self.size = 0
+        self.written = 0
+        self.file = open(path, "wb")
+        self.header()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self.written + self.size
+
+    def header(self):
+        pass
+
+    def write(self, data):
+        raise NotImplementedError
+
+    def append(self, event, t, source, value=-1):
+        self.chunk[self.size] = (event, t, source, value)
+        self.size += 1
+        if self.size == len(self.chunk):
+            self.flush()
+
+    def flush(self):
+        if self.size:
+            self.write(self.chunk[:self.size])
+            self.written += self.size
+            self.size = 0
+        self.file.flush()
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+
+
+class BinarySink(Sink):
+    def header(self):
+        self.file.write(magic)
+
+    def write(self, data):
+        data.tofile(self.file)
+
+
+class CsvSink(Sink):
+    def header(self):
+        self.file.write(b"event,t,source,value\n")
+
+    def write(self, data):
+        np.savetxt(self.file, data, fmt=("%d", "%.17g", "%d", "%d"), delimiter=",")
+
+
+def open_sink(path, chunk=65536):
+    if str(path).endswith(".csv"):
+        return CsvSink(path, chunk)
+    return BinarySink(path, chunk)
+
+
+def read_binary(path):
+    with open(path, "rb") as file:
+        if file.read(len(magic)) != magic:
+            raise ValueError("%s is not an SMO event log" % path)
+        if not file.read(1):
+            return np.empty(0, dtype=record)
+    return np.memmap(path, dtype=record, mode="r", offset=len(magic))
+
+
+def read_csv(path):
+    return np.loadtxt(path, dtype=record, delimiter=",", skiprows=1, ndmin=1)
+
+
+def read(path):
+    if str(path).endswith(".csv"):
+        return read_csv(path)
+    return read_binary(path)
+
+
+def replay(path, log=None):
+    data = read(path)
+    if log is None:
+        log = EventLog(max(len(data), 1))
+    for e, t, source, value in zip(
+        data["event"].tolist(), data["t"].tolist(), data["source"].tolist(), data["value"].tolist()
+    ):
+        log.append(e, t, source, value)
+    return log
@@ -0,0 +1,116 @@
+import time
+
+events = ("arrival", "placement", "displacement", "drop", "dispatch", "completion", "halt")
+phases = ("arrival", "buffer", "dispatch", "completion", "logging")
+
+wrapped = ("step", "arrive", "enqueue", "dispatch", "push_to_device", "complete", "save")
+
+
+def idle():
+    return 0.0
+
+
+class Instrumentation:
+    def __init__(self, sample=64, callback=None, every=10000):
+        self.sample = sample
+        self.callback = callback
+        self.every = every
+        self.system = None
+        self.clock = idle
+        self.reset()
+
+    def reset(self):
+        self.ticks = 0
+        self.sampled = 0
+        self.counts = dict.fromkeys(events, 0)
+        self.time = dict.fromkeys(phases, 0.0)
+        self.stack = []
+
+    def attach(self, system):
+        if system.instrumentation is not None:
+            system.instrumentation.detach()
+        self.system = system
+        system.instrumentation = self
+
+        counts = self.counts
+        step = system.step
+        arrive = system.arrive
+        enqueue = system.enqueue
+        push_to_device = system.push_to_device
+        complete = system.complete
+
+        def counted_step():
+            self.ticks += 1
+            if self.ticks % self.sample == 0:
+                self.sampled += 1
+                self.clock = time.perf_counter
+            step()
+            self.clock = idle
+            if self.callback is not None and self.ticks % self.every == 0:
+                self.callback(self.snapshot())
+
+        def counted_arrive():
+            counts["arrival"] += 1
+            arrive()
+
+        def counted_enqueue(s):
+            drop, i = r = enqueue(s)
+            counts["placement" if drop else "drop" if i == -1 else "displacement"] += 1
+            return r
+
+        def counted_push_to_device(device):
+            package = push_to_device(device)
+            counts["dispatch" if package else "halt"] += 1
+            return package
+
+        def counted_complete():
+            busy = complete()
+            if busy:
+                counts["completion"] += 1
+            return busy
+
+        system.step = counted_step
+        system.arrive = self.timed("arrival", counted_arrive)
+        system.enqueue = self.timed("buffer", counted_enqueue)
+        system.dispatch = self.timed("dispatch", system.dispatch)
+        system.push_to_device = self.timed("dispatch", counted_push_to_device)
+        system.complete = self.timed("completion", counted_complete)
+        system.save = self.timed("logging", system.save)
+        return self
+
+    def timed(self, phase, method):
+        spent = self.time
+        stack = self.stack
+
+        def f(*args):
+            clock = self.clock
+            if clock is idle:
+                return method(*args)
+            stack.append(0.0)
+            a = clock()
+            r = method(*args)
+            elapsed = clock() - a
+            spent[phase] += elapsed - stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            return r
+        return f
+
+    def detach(self):
+        system = self.system
+        if system is None:
+            return
+        for name in wrapped:
+            del system.__dict__[name]
+        system.instrumentation = None
+        self.system = None
+
+    def snapshot(self):
+        scale = self.ticks / self.sampled if self.sampled else 0.0
+        return {
+            "ticks": self.ticks,
+            "sampled": self.sampled,
+            "counts": dict(self.counts),
+            "sampled_time": dict(self.time),
+            "estimated_time": {p: t * scale for p, t in self.time.items()},
+        }
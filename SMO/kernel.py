@@ -0,0 +1,637 @@
+import math
+import sys
+
+import numpy as np
+
+from SMO.device import Status
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+def jit(f):
+    if numba is None:
+        return f
+    return numba.njit(cache=True)(f)
+
+
+FINISHED = 0
+BUDGET = 1
+REFILL = 2
+
+TB = 0
+TP = 1
+TS = 2
+
+BUSY = 0
+READY = 1
+HALT = 2
+
+# scalar state: floats
+T = 0
+SC_T = 1
+DC_T = 2
+
+# scalar state: ints
+GENERATED = 0
+LIMIT = 1
+POINTER = 2
+PACKAGES = 3
+ACCEPTED = 4
+DROPPED = 5
+HEAD = 6
+LENGTH = 7
+DC_POINTER = 8
+WORKING = 9
+MIN = 10
+MAX = 11
+RUNNING = 12
+
+status_codes = {Status.BUSY: BUSY, Status.READY: READY, Status.HALT: HALT}
+statuses = {v: k for k, v in status_codes.items()}
+
+
+def available():
+    return numba is not None
+
+
+@jit
+def better(key, a, b):
+    if a < 0:
+        return b
+    if b < 0:
+        return a
+    if key[b] < key[a] or (key[b] == key[a] and b < a):
+        return b
+    return a
+
+
+@jit
+def tree_build(tree, key):
+    size = len(tree) // 2
+    for i in range(size):
+        tree[size + i] = i if i < len(key) else -1
+    for i in range(size - 1, 0, -1):
+        tree[i] = better(key, tree[2 * i], tree[2 * i + 1])
+
+
+@jit
+def tree_update(tree, key, i):
+    j = (len(tree) // 2 + i) // 2
+    while j >= 1:
+        k = better(key, tree[2 * j], tree[2 * j + 1])
+        if k == tree[j] and k != i:
+            break
+        tree[j] = k
+        j //= 2
+
+
+@jit
+def tree_next(tree, key, i):
+    j = len(tree) // 2 + i
+    k = tree[j]
+    if k >= 0 and key[k] < math.inf:
+        return k
+    while j > 1:
+        if j % 2 == 0:
+            k = tree[j + 1]
+            if k >= 0 and key[k] < math.inf:
+                return k
+        j //= 2
+    return -1
+
+
+def tree_for(key):
+    size = 1
+    while size < len(key):
+        size *= 2
+    tree = np.empty(2 * size, dtype=np.int64)
+    tree_build(tree, key)
+    return tree
+
+
+@jit
+def p2_add(n, q, pos, desired, increments, x):
+    if n <= 5:
+        i = n - 1
+        while i > 0 and q[i - 1] > x:
+            q[i] = q[i - 1]
+            i -= 1
+        q[i] = x
+        return
+
+    if x < q[0]:
+        q[0] = x
+        k = 0
+    elif x >= q[4]:
+        q[4] = x
+        k = 3
+    else:
+        lo = 0
+        hi = 5
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if x < q[mid]:
+                hi = mid
+            else:
+                lo = mid + 1
+        k = lo - 1
+
+    for i in range(k + 1, 5):
+        pos[i] += 1
+    for i in range(5):
+        desired[i] += increments[i]
+
+    for i in range(1, 4):
+        d = desired[i] - pos[i]
+        if (d >= 1.0 and pos[i + 1] - pos[i] > 1) or (d <= -1.0 and pos[i - 1] - pos[i] < -1):
+            s = 1 if d > 0 else -1
+            qp = q[i] + s / (pos[i + 1] - pos[i - 1]) * (
+                (pos[i] - pos[i - 1] + s) * (q[i + 1] - q[i]) / (pos[i + 1] - pos[i]) +
+                (pos[i + 1] - pos[i] - s) * (q[i] - q[i - 1]) / (pos[i] - pos[i - 1])
+            )
+            if not (q[i - 1] < qp and qp < q[i + 1]):
+                qp = q[i] + s * (q[i + s] - q[i]) / (pos[i + s] - pos[i])
+            q[i] = qp
+            pos[i] += s
+
+
+@jit
+def stat_add(st_n, st_mean, st_m2, p2_n, p2_q, p2_pos, p2_desired, p2_increments, hist, hist_f, k, s, x):
+    n = st_n[k, s] + 1
+    st_n[k, s] = n
+    delta = x - st_mean[k, s]
+    st_mean[k, s] += delta / n
+    st_m2[k, s] += delta * (x - st_mean[k, s])
+    if k != TS:
+        return
+
+    for j in range(p2_n.shape[1]):
+        p2_n[s, j] += 1
+        p2_add(p2_n[s, j], p2_q[s, j], p2_pos[s, j], p2_desired[s, j], p2_increments[j], x)
+
+    bins = hist.shape[1] - 2
+    if bins > 0:
+        i = int((x - hist_f[0]) // hist_f[1]) + 1
+        if i < 0:
+            i = 0
+        elif i > bins:
+            i = bins + 1
+        hist[s, i] += 1
+
+
+@jit
+def simulate(
+    fs, ints,
+    src_t, src_dt, src_count, src_dropped, src_stream, src_buf, src_len, src_idx, src_tree,
+    dev_status, dev_c, dev_t, dev_dt, dev_tt, dev_eta, dev_src, dev_pt,
+    dev_buf, dev_len, dev_idx, dev_key, dev_tree, ready_key, ready_tree,
+    slot_src, slot_t, slot_queued, free_key, free_tree, queue, counts,
+    st_n, st_mean, st_m2, p2_n, p2_q, p2_pos, p2_desired, p2_increments, hist, hist_f,
+    limit
+):
+    S = len(src_t)
+    B = len(slot_src)
+    t = fs[T]
+    done = 0
+    code = BUDGET
+
+    while done < limit:
+        if ints[GENERATED] == ints[LIMIT] and ints[WORKING] == 0:
+            ints[RUNNING] = 0
+            code = FINISHED
+            break
+
+        refill = False
+        s = src_tree[1]
+        d = dev_tree[1]
+        device = -1
+        if ((d < 0 or dev_key[d] == math.inf) or src_t[s] < dev_key[d]) and ints[GENERATED] < ints[LIMIT]:
+            t = src_t[s]
+
+            ints[PACKAGES] += 1
+            ints[ACCEPTED] += 1
+            j = free_tree[1] if B > 0 else -1
+            if j >= 0 and free_key[j] < math.inf:
+                free_key[j] = math.inf
+                tree_update(free_tree, free_key, j)
+                placed = True
+            else:
+                placed = False
+                ints[DROPPED] += 1
+                m = ints[MIN]
+                j = -1
+                if m < S:
+                    p = ints[POINTER]
+                    for n in range(B):
+                        i = p + n
+                        if i >= B:
+                            i -= B
+                        if slot_src[i] == m and not slot_queued[i]:
+                            j = i
+                            break
+                if j < 0:
+                    src_dropped[s] += 1
+                    ints[ACCEPTED] -= 1
+                else:
+                    ints[POINTER] = j
+                    r = slot_src[j]
+                    dt = t - slot_t[j]
+                    stat_add(st_n, st_mean, st_m2, p2_n, p2_q, p2_pos, p2_desired, p2_increments, hist, hist_f, TB, r, dt)
+                    stat_add(st_n, st_mean, st_m2, p2_n, p2_q, p2_pos, p2_desired, p2_increments, hist, hist_f, TS, r, dt)
+                    src_dropped[r] += 1
+
+                    counts[r] -= 1
+                    if counts[r] == 0:
+                        if r == ints[MIN]:
+                            while ints[MIN] < S and counts[ints[MIN]] == 0:
+                                ints[MIN] += 1
+                        if r == ints[MAX]:
+                            while ints[MAX] >= 0 and counts[ints[MAX]] == 0:
+                                ints[MAX] -= 1
+                    placed = True
+
+            if placed:
+                slot_src[j] = s
+                slot_t[j] = t
+                slot_queued[j] = False
+                counts[s] += 1
+                if s < ints[MIN]:
+                    ints[MIN] = s
+                if s > ints[MAX]:
+                    ints[MAX] = s
+
+            p = tree_next(ready_tree, ready_key, ints[DC_POINTER])
+            if p < 0:
+                p = ready_tree[1]
+                if p >= 0 and ready_key[p] == math.inf:
+                    p = -1
+            if p >= 0:
+                ints[DC_POINTER] = p
+                fs[DC_T] = dev_t[p]
+                device = p
+
+            next_source = True
+        else:
+            device = d
+            if dev_key[d] > t:
+                t = dev_key[d]
+            else:
+                dev_t[d] = t
+            if dev_status[d] == BUSY:
+                r = dev_src[d]
+                dev_c[d] += 1
+                dev_t[d] = dev_eta[d]
+                dev_tt[d] += dev_dt[d]
+                stat_add(st_n, st_mean, st_m2, p2_n, p2_q, p2_pos, p2_desired, p2_increments, hist, hist_f, TP, r, dev_dt[d])
+                stat_add(
+                    st_n, st_mean, st_m2, p2_n, p2_q, p2_pos, p2_desired, p2_increments, hist, hist_f,
+                    TS, r, dev_t[d] - dev_pt[d]
+                )
+                dev_src[d] = -1
+                dev_status[d] = READY
+                ints[WORKING] -= 1
+            next_source = False
+
+        if device >= 0:
+            j = -1
+            if ints[LENGTH] == 0:
+                m = ints[MAX]
+                if m >= 0:
+                    for i in range(B):
+                        if slot_src[i] == m:
+                            slot_queued[i] = True
+                            n = ints[HEAD] + ints[LENGTH]
+                            if n >= B:
+                                n -= B
+                            queue[n] = i
+                            ints[LENGTH] += 1
+            if ints[LENGTH] > 0:
+                j = queue[ints[HEAD]]
+                ints[HEAD] += 1
+                if ints[HEAD] == B:
+                    ints[HEAD] = 0
+                ints[LENGTH] -= 1
+
+            dev_t[device] = t
+            if j >= 0:
+                r = slot_src[j]
+                pt = slot_t[j]
+                slot_src[j] = -1
+                slot_queued[j] = False
+                counts[r] -= 1
+                if counts[r] == 0:
+                    if r == ints[MIN]:
+                        while ints[MIN] < S and counts[ints[MIN]] == 0:
+                            ints[MIN] += 1
+                    if r == ints[MAX]:
+                        while ints[MAX] >= 0 and counts[ints[MAX]] == 0:
+                            ints[MAX] -= 1
+                free_key[j] = j
+                tree_update(free_tree, free_key, j)
+                stat_add(st_n, st_mean, st_m2, p2_n, p2_q, p2_pos, p2_desired, p2_increments, hist, hist_f, TB, r, t - pt)
+
+                dev_dt[device] = dev_buf[device, dev_idx[device]]
+                dev_idx[device] += 1
+                if dev_idx[device] == dev_len[device]:
+                    refill = True
+                dev_eta[device] = dev_t[device] + dev_dt[device]
+                dev_src[device] = r
+                dev_pt[device] = pt
+                dev_status[device] = BUSY
+                ints[WORKING] += 1
+                dev_key[device] = dev_eta[device]
+                ready_key[device] = math.inf
+            else:
+                dev_status[device] = HALT
+                dev_key[device] = math.inf
+                ready_key[device] = device
+            tree_update(dev_tree, dev_key, device)
+            tree_update(ready_tree, ready_key, device)
+            d = dev_tree[1]
+            if d >= 0 and dev_key[d] < math.inf:
+                fs[DC_T] = dev_key[d]
+
+        if next_source:
+            src_count[s] += 1
+            if src_stream[s]:
+                src_t[s] += src_buf[s, src_idx[s]]
+                src_idx[s] += 1
+                if src_idx[s] == src_len[s]:
+                    refill = True
+            else:
+                src_t[s] += src_dt[s]
+            ints[GENERATED] += 1
+            tree_update(src_tree, src_t, s)
+            fs[SC_T] = src_t[src_tree[1]]
+
+        done += 1
+        if refill:
+            code = REFILL
+            break
+
+    fs[T] = t
+    return code, done
+
+
+class State:
+    def __init__(self, system):
+        self.system = system
+        self.load()
+
+    def load(self):
+        system = self.system
+        sources = system.sc.sources
+        devices = system.dc.devices
+        b = system.b
+        S = len(sources)
+        D = len(devices)
+
+        self.fs = np.array([system.t, system.sc.t, system.dc.t], dtype=np.float64)
+        self.ints = np.array([
+            system.sc.generated, system.limit, b.pointer, b.packages, b.accepted, b.dropped,
+            0, len(b.queue), system.dc.pointer, system.dc.busy(),
+            min(b.min, S), b.max, int(system.running)
+        ], dtype=np.int64)
+
+        self.src_t = np.array([s.t for s in sources], dtype=np.float64)
+        self.src_dt = np.array([s.dt for s in sources], dtype=np.float64)
+        self.src_count = np.array([s.count for s in sources], dtype=np.int64)
+        self.src_dropped = np.array([s.dropped for s in sources], dtype=np.int64)
+        self.src_stream = np.array([s.stream is not None for s in sources], dtype=np.bool_)
+        self.src_variates = [s.stream for s in sources]
+        self.src_buf, self.src_len, self.src_idx = self.load_variates(self.src_variates)
+        self.src_tree = tree_for(self.src_t)
+
+        self.dev_status = np.array([status_codes[d.status] for d in devices], dtype=np.int64)
+        self.dev_c = np.array([d.c for d in devices], dtype=np.int64)
+        self.dev_t = np.array([d.t for d in devices], dtype=np.float64)
+        self.dev_dt = np.array([d.dt for d in devices], dtype=np.float64)
+        self.dev_tt = np.array([d.tt for d in devices], dtype=np.float64)
+        self.dev_eta = np.array([d.eta for d in devices], dtype=np.float64)
+        self.dev_src = np.array([d.package.source.id if d.package else -1 for d in devices], dtype=np.int64)
+        self.dev_pt = np.array([d.package.t if d.package else 0.0 for d in devices], dtype=np.float64)
+        self.dev_variates = [d.stream for d in devices]
+        self.dev_buf, self.dev_len, self.dev_idx = self.load_variates(self.dev_variates)
+        self.dev_key = np.full(D, math.inf)
+        for d, r in system.dc.schedule.entries.items():
+            self.dev_key[d.id] = r[0]
+        self.dev_tree = tree_for(self.dev_key)
+        self.ready_key = np.where(self.dev_status != BUSY, np.arange(D, dtype=np.float64), math.inf)
+        self.ready_tree = tree_for(self.ready_key)
+
+        self.slot_src = np.array([r.source.id if r else -1 for r in b.data], dtype=np.int64)
+        self.slot_t = np.array([r.t if r else 0.0 for r in b.data], dtype=np.float64)
+        self.slot_queued = np.array([r.queued if r else False for r in b.data], dtype=np.bool_)
+        self.free_key = np.where(self.slot_src < 0, np.arange(b.size, dtype=np.float64), math.inf)
+        self.free_tree = tree_for(self.free_key)
+        self.queue = np.zeros(b.size, dtype=np.int64)
+        self.queue[:len(b.queue)] = list(b.queue)
+        self.counts = np.zeros(S, dtype=np.int64)
+        for id, n in b.counts.items():
+            self.counts[id] = n
+
+        stats = [[s.tb for s in sources], [s.tp for s in sources], [s.ts for s in sources]]
+        self.st_n = np.array([[r.n for r in row] for row in stats], dtype=np.int64).reshape(3, S)
+        self.st_mean = np.array([[r.mean for r in row] for row in stats], dtype=np.float64).reshape(3, S)
+        self.st_m2 = np.array([[r.m2 for r in row] for row in stats], dtype=np.float64).reshape(3, S)
+
+        Q = len(sources[0].ts.sketches or ()) if S else 0
+        self.p2_n = np.zeros((S, Q), dtype=np.int64)
+        self.p2_q = np.zeros((S, Q, 5), dtype=np.float64)
+        self.p2_pos = np.zeros((S, Q, 5), dtype=np.int64)
+        self.p2_desired = np.zeros((S, Q, 5), dtype=np.float64)
+        self.p2_increments = np.zeros((Q, 5), dtype=np.float64)
+        for i, s in enumerate(sources):
+            for j, k in enumerate(s.ts.sketches or ()):
+                self.p2_n[i, j] = k.n
+                self.p2_q[i, j, :len(k.q)] = k.q
+                self.p2_pos[i, j] = k.pos
+                self.p2_desired[i, j] = k.desired
+                self.p2_increments[j] = k.increments
+
+        h = sources[0].ts.histogram if S else None
+        self.hist = np.array([s.ts.histogram.counts for s in sources] if h else np.zeros((S, 0)), dtype=np.int64)
+        self.hist_f = np.array([h.low, h.width] if h else [0.0, 1.0], dtype=np.float64)
+
+    def load_variates(self, variates):
+        rest = [list(v.values) if v is not None else [] for v in variates]
+        size = max([len(r) for r in rest] + [v.block for v in variates if v is not None] + [1])
+        buf = np.zeros((len(variates), size), dtype=np.float64)
+        length = np.zeros(len(variates), dtype=np.int64)
+        for i, r in enumerate(rest):
+            buf[i, :len(r)] = r
+            length[i] = len(r)
+        return buf, length, np.zeros(len(variates), dtype=np.int64)
+
+    def refill(self, variates, buf, length, index):
+        for i in np.nonzero(index == length)[0].tolist():
+            v = variates[i]
+            if v is None:
+                continue
+            block = np.asarray(v.draw(v.generator, v.block), dtype=np.float64)
+            if len(block) > buf.shape[1]:
+                raise ValueError("Variate block of %s exceeds kernel buffer of %s" % (len(block), buf.shape[1]))
+            buf[i, :len(block)] = block
+            length[i] = len(block)
+            index[i] = 0
+
+    def run(self, limit):
+        done = 0
+        while True:
+            self.refill(self.src_variates, self.src_buf, self.src_len, self.src_idx)
+            self.refill(self.dev_variates, self.dev_buf, self.dev_len, self.dev_idx)
+            code, n = simulate(
+                self.fs, self.ints,
+                self.src_t, self.src_dt, self.src_count, self.src_dropped, self.src_stream,
+                self.src_buf, self.src_len, self.src_idx, self.src_tree,
+                self.dev_status, self.dev_c, self.dev_t, self.dev_dt, self.dev_tt, self.dev_eta,
+                self.dev_src, self.dev_pt, self.dev_buf, self.dev_len, self.dev_idx, self.dev_key, self.dev_tree,
+                self.ready_key, self.ready_tree,
+                self.slot_src, self.slot_t, self.slot_queued, self.free_key, self.free_tree, self.queue, self.counts,
+                self.st_n, self.st_mean, self.st_m2,
+                self.p2_n, self.p2_q, self.p2_pos, self.p2_desired, self.p2_increments, self.hist, self.hist_f,
+                limit - done
+            )
+            done += n
+            if code != REFILL or done >= limit:
+                return done
+
+    def store(self):
+        system = self.system
+        sources = system.sc.sources
+        devices = system.dc.devices
+        b = system.b
+        fs = self.fs.tolist()
+        ints = self.ints.tolist()
+
+        system.t = fs[T]
+        system.running = bool(ints[RUNNING])
+        system.sc.t = fs[SC_T]
+        system.sc.generated = ints[GENERATED]
+        system.dc.t = fs[DC_T]
+        system.dc.pointer = ints[DC_POINTER]
+
+        stats = (self.st_n.tolist(), self.st_mean.tolist(), self.st_m2.tolist())
+        p2_n = self.p2_n.tolist()
+        p2_q = self.p2_q.tolist()
+        p2_pos = self.p2_pos.tolist()
+        p2_desired = self.p2_desired.tolist()
+        for i, s, t, count, dropped in zip(
+            range(len(sources)), sources, self.src_t.tolist(), self.src_count.tolist(), self.src_dropped.tolist()
+        ):
+            s.t = t
+            s.count = count
+            s.dropped = dropped
+            for k, r in enumerate((s.tb, s.tp, s.ts)):
+                r.n, r.mean, r.m2 = stats[0][k][i], stats[1][k][i], stats[2][k][i]
+            for j, sketch in enumerate(s.ts.sketches or ()):
+                sketch.n = p2_n[i][j]
+                sketch.q = p2_q[i][j][:min(sketch.n, 5)]
+                sketch.pos = p2_pos[i][j]
+                sketch.desired = p2_desired[i][j]
+            if s.ts.histogram:
+                s.ts.histogram.counts = self.hist[i].tolist()
+        self.store_variates(self.src_variates, self.src_buf, self.src_len, self.src_idx)
+
+        for r in b.data:
+            if r is not None:
+                b.pool.release(r)
+        for d in devices:
+            if d.package is not None:
+                b.pool.release(d.package)
+
+        for d, status, c, t, dt, tt, eta, src, pt in zip(
+            devices, self.dev_status.tolist(), self.dev_c.tolist(), self.dev_t.tolist(), self.dev_dt.tolist(),
+            self.dev_tt.tolist(), self.dev_eta.tolist(), self.dev_src.tolist(), self.dev_pt.tolist()
+        ):
+            d.status = statuses[status]
+            d.c = c
+            d.t = t
+            d.dt = dt
+            d.tt = tt
+            d.eta = eta
+            d.package = b.pool.acquire(sources[src], pt) if src >= 0 else None
+        self.store_variates(self.dev_variates, self.dev_buf, self.dev_len, self.dev_idx)
+
+        b.pointer = ints[POINTER]
+        b.packages = ints[PACKAGES]
+        b.accepted = ints[ACCEPTED]
+        b.dropped = ints[DROPPED]
+        for i, (src, t, queued) in enumerate(zip(
+            self.slot_src.tolist(), self.slot_t.tolist(), self.slot_queued.tolist()
+        )):
+            if src < 0:
+                b.data[i] = None
+                continue
+            b.data[i] = b.pool.acquire(sources[src], t)
+            b.data[i].queued = queued
+        queue = self.queue.tolist()
+        b.queue.clear()
+        for n in range(ints[LENGTH]):
+            b.queue.append(queue[(ints[HEAD] + n) % b.size])
+        b.rebuild()
+
+        system.sc.update_schedule()
+        system.dc.update_schedule()
+        system.timings = {system.sc: system.sc.schedule.peek(), system.dc: next(system.dc)}
+
+    def store_variates(self, variates, buf, length, index):
+        for i, v in enumerate(variates):
+            if v is not None:
+                v.values = iter(buf[i, index[i]:length[i]].tolist())
+
+
+def reason(system):
+    if numba is None:
+        return "numba is not installed"
+    if not system.streams:
+        return "variates are not drawn from per-entity streams"
+    if system.logging:
+        return "the event log is enabled"
+    if system.sink is not None:
+        return "events are streamed to a file"
+    if system.instrumentation is not None:
+        return "instrumentation is enabled"
+
+    sources = system.sc.sources
+    if not sources or not system.dc.devices:
+        return "the system has no sources or devices"
+    ts = sources[0].ts
+    for s in sources:
+        if s.distribution is not None and s.stream is None:
+            return "source %d has no variate stream" % s.id
+        for r in (s.tb, s.tp):
+            if r.quantiles or r.histogram:
+                return "buffer or processing time quantiles are tracked"
+        if (s.ts.sketches is None) != (ts.sketches is None) or s.ts.quantiles != ts.quantiles:
+            return "sources track different system time quantiles"
+        if bool(s.ts.histogram) != bool(ts.histogram):
+            return "sources use different system time histograms"
+        if ts.histogram and (s.ts.histogram.low, s.ts.histogram.width) != (ts.histogram.low, ts.histogram.width):
+            return "sources use different system time histograms"
+    for d in system.dc.devices:
+        if d.stream is None:
+            return "device %d has no variate stream" % d.id
+    return None
+
+
+def supported(system):
+    return reason(system) is None
+
+
+def execute(system, n=None):
+    if not system.running:
+        return 0
+    state = State(system)
+    done = state.run(sys.maxsize if n is None else n)
+    state.store()
+    return done
+
+
+def run_events(system, n=None):
+    if not supported(system):
+        return system.run_events(n)
+    return execute(system, n)
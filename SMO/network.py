@@ -0,0 +1,275 @@
+import bisect
+import json
+import random
+from datetime import datetime
+
+from SMO import distribution
+from SMO.buffer import Buffer
+from SMO.device import DeviceController, Status
+from SMO.distribution import per_entity
+from SMO.schedule import Schedule
+from SMO.source import Source, SourceController, default_quantiles
+from SMO.stats import merged
+from SMO.variate import entity_streams, substreams
+
+
+class Route:
+    def __init__(self, target=None):
+        if isinstance(target, dict):
+            self.targets = list(target)
+            total = float(sum(target.values()))
+            if total <= 0:
+                raise ValueError("Route weights must sum to a positive value")
+            self.cumulative = []
+            acc = 0.0
+            for w in target.values():
+                acc += w / total
+                self.cumulative.append(acc)
+        else:
+            self.targets = [target]
+            self.cumulative = None
+
+    def choose(self):
+        if self.cumulative is None:
+            return self.targets[0]
+        i = bisect.bisect_right(self.cumulative, random.random())
+        return self.targets[min(i, len(self.targets) - 1)]
+
+
+class Stage:
+    def __init__(
+        self, id, buffer, devices, service=(0.25, 1.0), route=None, sources=0,
+        quantiles=default_quantiles, histogram=None
+    ):
+        self.id = id
+        self.b = Buffer(buffer)
+        self.dc = DeviceController(devices, service)
+        self.route = Route(route)
+        self.classes = [Source(i, 0.0, quantiles, histogram) for i in range(sources)]
+
+    def reset(self):
+        self.b.reset()
+        self.dc.reset()
+        for c in self.classes:
+            c.reset()
+        for d in self.dc.devices:
+            d.status = Status.HALT
+            self.dc.update(d)
+
+    def drop_rate(self):
+        return self.b.dropped / self.b.packages if self.b.packages > 0 else 0
+
+    def usage_rate(self):
+        rates = self.dc.list_work_rate()
+        return sum(rates) / len(rates) if rates else 0.0
+
+    def stage_time(self):
+        return merged(c.ts for c in self.classes).mean
+
+    def buffer_time(self):
+        return merged(c.tb for c in self.classes).mean
+
+    def processing_time(self):
+        return merged(c.tp for c in self.classes).mean
+
+
+class Network:
+    def __init__(
+        self, ss, stages, routes=0, seed=None, interval=0.25, streams=False,
+        quantiles=default_quantiles, histogram=None
+    ):
+        self.sc = SourceController(ss, interval, quantiles, histogram)
+        self.stages = [
+            Stage(i, sources=ss, quantiles=quantiles, histogram=histogram, **spec) for i, spec in enumerate(stages)
+        ]
+        self.routes = [Route(r) for r in per_entity(routes, ss)]
+        for r in self.routes + [s.route for s in self.stages]:
+            for target in r.targets:
+                if target is not None and not 0 <= target < len(self.stages):
+                    raise ValueError("Route to unknown stage: %s" % target)
+        if any(None in r.targets for r in self.routes):
+            raise ValueError("Sources must be routed to a stage")
+
+        self.seed = seed if seed is not None else int(datetime.now().timestamp() * 1000000)
+        self.streams = streams
+        self.schedule = Schedule()
+        self.arrival = (self.sc.sources[0], 0.0)
+        self.t = 0
+        self.limit = 0
+        self.completed = 0
+        self.running = False
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        state["random"] = random.getstate()
+        return state
+
+    def __setstate__(self, state):
+        random.setstate(state.pop("random"))
+        self.__dict__.update(state)
+
+    def reset(self, limit):
+        self.limit = limit
+        self.running = True
+
+        self.t = 0
+        self.completed = 0
+        random.seed(self.seed)
+
+        self.sc.reset()
+        for stage in self.stages:
+            stage.reset()
+        if self.streams:
+            self.seed_streams()
+
+        self.schedule.reset()
+        self.arrival = (self.sc.sources[0], 0.0)
+        if limit > 0:
+            self.schedule.push(self.sc, 0.0, len(self.stages))
+
+    def seed_streams(self):
+        sources, devices = entity_streams(self.seed)
+        self.sc.set_streams(substreams(sources, len(self.sc), self.streams))
+        generators = substreams(devices, sum(len(stage.dc) for stage in self.stages), self.streams)
+        for stage in self.stages:
+            stage.dc.set_streams(generators[:len(stage.dc)])
+            generators = generators[len(stage.dc):]
+
+    def finished(self):
+        return not self.schedule
+
+    def run_events(self, n=None):
+        done = 0
+        step = self.step
+        while self.running and (n is None or done < n):
+            if self.finished():
+                self.running = False
+                break
+            step()
+            done += 1
+        return done
+
+    def run_until(self, t):
+        done = 0
+        step = self.step
+        while self.running:
+            if self.finished():
+                self.running = False
+                break
+            if self.schedule.peek()[1] > t:
+                break
+            step()
+            done += 1
+        return done
+
+    def tick(self):
+        if self.finished():
+            self.running = False
+
+        if not self.running:
+            return
+
+        self.step()
+
+    def step(self):
+        item, t = self.schedule.peek()
+        if item is self.sc:
+            self.arrive()
+        else:
+            self.complete(item)
+
+    def arrive(self):
+        s, self.t = self.arrival
+        self.enter(self.stages[self.routes[s.id].choose()], s.id, self.t)
+        self.arrival = next(self.sc)
+        if self.sc.count() < self.limit:
+            self.schedule.push(self.sc, self.arrival[1], len(self.stages))
+        else:
+            self.schedule.remove(self.sc)
+
+    def complete(self, stage):
+        device, nt = stage.dc.schedule.peek()
+        if nt > self.t:
+            self.t = nt
+        package = device.package
+        id = package.source.id
+        origin = package.origin
+        device.end()
+        stage.b.pool.release(package)
+        self.push(stage, device)
+
+        target = stage.route.choose()
+        if target is None:
+            self.completed += 1
+            self.sc.sources[id].add_system_time(self.t - origin)
+        else:
+            self.enter(self.stages[target], id, origin)
+        self.update(stage)
+
+    def enter(self, stage, id, origin):
+        stage.classes[id].count += 1
+        drop, i = stage.b.add(stage.b.pool.acquire(stage.classes[id], self.t, origin))
+        if not drop:
+            self.sc.sources[id if i == -1 else i].dropped += 1
+        device = stage.dc.select_free_device()
+        if device:
+            self.push(stage, device)
+        self.update(stage)
+
+    def push(self, stage, device):
+        package = stage.b.pick(self.t)
+        device.t = self.t
+        if package:
+            device.process(package)
+        else:
+            device.status = Status.HALT
+        stage.dc.update(device)
+
+    def update(self, stage):
+        r = stage.dc.schedule.peek()
+        if r:
+            self.schedule.push(stage, r[1], stage.id)
+        else:
+            self.schedule.remove(stage)
+
+    def dropped(self):
+        return self.sc.dropped()
+
+    def drop_rate(self):
+        return self.sc.dropped_rate()
+
+    def system_time(self):
+        return merged(s.ts for s in self.sc.sources).mean
+
+
+def parse_service(value):
+    if isinstance(value, str):
+        return distribution.parse(value)
+    return tuple(value)
+
+
+def parse_route(value):
+    if isinstance(value, dict):
+        return {int(k): w for k, w in value.items()}
+    return value
+
+
+def from_spec(spec, seed=None, streams=False):
+    interval = spec.get("interval", 0.25)
+    if isinstance(interval, str):
+        interval = distribution.parse(interval)
+    routes = spec.get("routes", 0)
+    routes = [parse_route(r) for r in routes] if isinstance(routes, list) else parse_route(routes)
+    stages = [
+        dict(
+            buffer=s["buffer"], devices=s["devices"],
+            service=parse_service(s.get("service", (0.25, 1.0))), route=parse_route(s.get("route"))
+        )
+        for s in spec["stages"]
+    ]
+    return Network(spec.get("sources", 5), stages, routes, seed, interval, streams)
+
+
+def load(path, seed=None, streams=False):
+    with open(path) as file:
+        return from_spec(json.load(file), seed, streams)
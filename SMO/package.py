@@ -0,0 +1,28 @@
+class Package:
+    __slots__ = ("source", "t", "origin", "queued")
+
+    def __init__(self):
+        self.source = None
+        self.t = 0.0
+        self.origin = 0.0
+        self.queued = False
+
+
+class PackagePool:
+    def __init__(self, size=0):
+        self.free = [Package() for _ in range(size)]
+
+    def __len__(self):
+        return len(self.free)
+
+    def acquire(self, source, t, origin=None):
+        r = self.free.pop() if self.free else Package()
+        r.source = source
+        r.t = t
+        r.origin = t if origin is None else origin
+        r.queued = False
+        return r
+
+    def release(self, package):
+        package.source = None
+        self.free.append(package)
@@ -0,0 +1,138 @@
+import numpy as np
+from matplotlib.collections import PolyCollection
+
+from SMO.eventlog import Event
+from SMO.snapshot import source_colors
+
+
+class Page:
+    def __init__(self, x):
+        self.x = x
+        self.artists = []
+
+    def animate(self, artist):
+        artist.set_animated(True)
+        self.artists.append(artist)
+        return artist
+
+    def update(self, snapshot):
+        self.x.set_xlim(snapshot.start, snapshot.end)
+
+
+class DevicePage(Page):
+    def __init__(self, x, snapshot):
+        super().__init__(x)
+        self.colors = source_colors(snapshot.sources)
+        self.bars = self.animate(PolyCollection([]))
+        x.add_collection(self.bars)
+
+        x.set_title("Активность устройств")
+        x.set_yticks([i + 1 for i in range(snapshot.devices)])
+        x.set_yticklabels([i + 1 for i in range(snapshot.devices)])
+        x.set_ylim(0.5, snapshot.devices + 0.5)
+
+    def update(self, snapshot):
+        super().update(snapshot)
+        verts = []
+        colormap = []
+        for i, intervals in enumerate(snapshot.intervals):
+            low = i + 1 - .4
+            high = i + 1 + .4
+            for n, a, b, src in intervals:
+                verts.append(((a, low), (a, high), (b, high), (b, low), (a, low)))
+                colormap.append(self.colors[n % 2][src])
+        self.bars.set_verts(verts)
+        self.bars.set_facecolor(colormap)
+
+
+class BufferPage(Page):
+    markers = (
+        (Event.READY, 'b', 'v'),
+        (Event.BUSY, 'b', '>'),
+        (Event.PLACE, 'g', 'o'),
+        (Event.DROP, 'r', 'x'),
+        (Event.CHANGE, 'y', '.'),
+    )
+
+    def __init__(self, x, snapshot):
+        super().__init__(x)
+        self.points = [
+            (e, self.animate(x.scatter([], [], color=color, marker=marker))) for e, color, marker in self.markers
+        ]
+
+        x.set_title("События источников")
+        x.set_yticks([i + 1 for i in range(snapshot.sources)])
+        x.set_yticklabels([i + 1 for i in range(snapshot.sources)])
+        x.set_ylim(0.5, snapshot.sources + 0.5)
+
+    def update(self, snapshot):
+        super().update(snapshot)
+        event, t, source, value = snapshot.events
+        for e, artist in self.points:
+            m = event == e
+            artist.set_offsets(np.column_stack((t[m], source[m] + 1)))
+
+
+class QueuePage(Page):
+    def __init__(self, x, snapshot):
+        super().__init__(x)
+        self.line, = x.plot([], [])
+        self.animate(self.line)
+
+        x.set_title("Размер очереди по времени")
+        x.set_yticks([i + 1 for i in range(snapshot.buffer)])
+        x.set_yticklabels([i + 1 for i in range(snapshot.buffer)])
+        x.set_ylim(0, snapshot.buffer)
+
+    def update(self, snapshot):
+        super().update(snapshot)
+        self.line.set_data(*snapshot.queue)
+
+
+pages = (DevicePage, BufferPage, QueuePage)
+
+
+class Renderer:
+    def __init__(self, figure, canvas):
+        self.figure = figure
+        self.canvas = canvas
+        self.kind = 0
+        self.layout = None
+        self.page = None
+        self.background = None
+        self.canvas.mpl_connect("draw_event", self.on_draw)
+
+    def set_page(self, i):
+        self.kind = i
+        self.page = None
+
+    def on_draw(self, event):
+        if self.page is None:
+            return
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.draw_artists()
+
+    def draw_artists(self):
+        x = self.page.x
+        for artist in self.page.artists:
+            x.draw_artist(artist)
+        x.draw_artist(x.xaxis)
+
+    def draw(self, snapshot):
+        layout = (self.kind, snapshot.sources, snapshot.devices, snapshot.buffer)
+        if self.page is None or layout != self.layout:
+            self.figure.clf()
+            x = self.figure.add_subplot(111)
+            x.xaxis.set_animated(True)
+            self.page = pages[self.kind](x, snapshot)
+            self.layout = layout
+            self.background = None
+
+        self.page.update(snapshot)
+        if self.background is None:
+            self.canvas.draw()
+            return
+
+        self.canvas.restore_region(self.background)
+        self.draw_artists()
+        self.canvas.blit(self.figure.bbox)
@@ -0,0 +1,104 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from numpy.random import SeedSequence
+
+from SMO.runner import run_headless
+from SMO.stats import Estimate, merged
+
+metrics = (
+    "drop_rate",
+    "usage_rate",
+    "system_time",
+    "buffer_time",
+    "processing_time",
+)
+
+modes = ("independent", "crn", "antithetic")
+
+
+def spawn_seeds(seed, n):
+    return [int(s.generate_state(1)[0]) for s in SeedSequence(seed).spawn(n)]
+
+
+def measure(system):
+    sources = system.sc.sources
+    rates = system.dc.list_work_rate()
+    return {
+        "drop_rate": system.drop_rate(),
+        "usage_rate": sum(rates) / len(rates) if rates else 0.0,
+        "system_time": merged(s.ts for s in sources).mean,
+        "buffer_time": merged(s.tb for s in sources).mean,
+        "processing_time": merged(s.tp for s in sources).mean,
+    }
+
+
+def run_replication(ss, bs, ds, limit, seed, **kwargs):
+    system, events, elapsed = run_headless(ss, bs, ds, limit, seed, **kwargs)
+    r = measure(system)
+    r["seed"] = seed
+    r["events"] = events
+    r["elapsed"] = elapsed
+    return r
+
+
+def run_task(task):
+    ss, bs, ds, limit, seed, kwargs = task
+    return run_replication(ss, bs, ds, limit, seed, **kwargs)
+
+
+def run_tasks(tasks, workers=None):
+    if workers == 1:
+        return list(map(run_task, tasks))
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(run_task, tasks))
+
+
+def plan(seeds, mode, kwargs):
+    if mode not in modes:
+        raise ValueError("Unknown replication mode: %s" % mode)
+    if mode == "antithetic":
+        return [(s, dict(kwargs, streams=k)) for s in seeds for k in ("inverse", "antithetic")], 2
+    if mode == "crn":
+        return [(s, dict(kwargs, streams=True)) for s in seeds], 1
+    return [(s, kwargs) for s in seeds], 1
+
+
+def group_means(samples, size):
+    if size == 1:
+        return samples
+    return [
+        {m: sum(s[m] for s in samples[i:i + size]) / size for m in metrics}
+        for i in range(0, len(samples), size)
+    ]
+
+
+def replicate(ss, bs, ds, limit, n, seed=None, workers=None, level=0.9, mode="independent", **kwargs):
+    runs, size = plan(spawn_seeds(seed, -(-n // 2) if mode == "antithetic" else n), mode, kwargs)
+    samples = run_tasks([(ss, bs, ds, limit, s, k) for s, k in runs], workers)
+
+    groups = group_means(samples, size)
+    estimates = {m: Estimate([g[m] for g in groups], level) for m in metrics}
+    return samples, estimates
+
+
+def compare(a, b, n, seed=None, workers=None, level=0.9, mode="crn"):
+    pairs = -(-n // 2) if mode == "antithetic" else n
+    if mode == "independent":
+        seeds = spawn_seeds(seed, 2 * pairs)
+        seeds_a, seeds_b = seeds[:pairs], seeds[pairs:]
+    else:
+        seeds_a = seeds_b = spawn_seeds(seed, pairs)
+
+    tasks = []
+    for config, seeds in ((a, seeds_a), (b, seeds_b)):
+        kwargs = {k: v for k, v in config.items() if k not in ("sources", "buffer", "devices", "limit")}
+        runs, size = plan(seeds, mode, kwargs)
+        tasks += [(config["sources"], config["buffer"], config["devices"], config["limit"], s, k) for s, k in runs]
+
+    samples = run_tasks(tasks, workers)
+    samples_a, samples_b = samples[:len(samples) // 2], samples[len(samples) // 2:]
+    groups_a, groups_b = group_means(samples_a, size), group_means(samples_b, size)
+    differences = {
+        m: Estimate([x[m] - y[m] for x, y in zip(groups_a, groups_b)], level) for m in metrics
+    }
+    return samples_a, samples_b, differences
@@ -0,0 +1,143 @@
+import time
+
+from SMO import checkpoint, kernel
+from SMO.export import open_sink
+from SMO.sequential import Warmup
+from SMO.system import System
+
+
+def advance(system, accelerate=True, path=None, every=1000000, fallback=None):
+    if accelerate and fallback is not None:
+        why = kernel.reason(system)
+        if why is not None:
+            fallback(why)
+    if path is not None:
+        return checkpoint.run(system, path, every, accelerate)
+    return kernel.run_events(system) if accelerate else system.run_events()
+
+
+def run(system, limit, accelerate=True, warmup=False, path=None, every=1000000, fallback=None):
+    system.reset(limit)
+
+    start = time.perf_counter()
+    if warmup is True:
+        events = Warmup(system).run()
+    else:
+        events = Warmup(system, min_observations=warmup).run() if warmup else 0
+    events += advance(system, accelerate, path, every, fallback)
+    elapsed = time.perf_counter() - start
+
+    return events, elapsed
+
+
+def resume(source, accelerate=True, path=None, every=1000000, fallback=None):
+    system = checkpoint.load(source)
+
+    start = time.perf_counter()
+    events = advance(system, accelerate, path, every, fallback)
+    elapsed = time.perf_counter() - start
+
+    return system, events, elapsed
+
+
+def run_headless(
+    ss, bs, ds, limit, seed=None, events=None, accelerate=True, warmup=False, instrument=False,
+    path=None, every=1000000, fallback=None, **kwargs
+):
+    system = System(ss, bs, ds, seed, **kwargs)
+    system.logging = False
+    system.fast_forward = True
+    if instrument:
+        system.instrument()
+    if events is None:
+        n, elapsed = run(system, limit, accelerate, warmup, path, every, fallback)
+    else:
+        with open_sink(events) as system.sink:
+            n, elapsed = run(system, limit, accelerate, warmup, path, every, fallback)
+        system.sink = None
+    return system, n, elapsed
+
+
+def report(system, events, elapsed, file=None):
+    sc = system.sc
+    dc = system.dc
+
+    quantiles = list(sc.sources[0].ts.quantiles) if sc.sources else []
+
+    print("Sources", file=file)
+    print(("%6s %10s %12s %12s %12s %12s %12s %12s" + " %12s" * len(quantiles)) % ((
+        "ID", "Generated", "DropRate", "AvgSystem", "AvgBuffer", "s^2 Buffer", "AvgProcess", "s^2 Process"
+    ) + tuple("P%g System" % (p * 100) for p in quantiles)), file=file)
+    rows = zip(
+        sc.list_count(), sc.list_dropped_rate(), sc.list_system_time(),
+        sc.list_buffer_time(), sc.list_buffer_time_dispersion(),
+        sc.list_processing_time(), sc.list_processing_time_dispersion(),
+        *[sc.list_system_time_quantile(p) for p in quantiles]
+    )
+    for i, row in enumerate(rows):
+        print(("%6s %10s %11.5f%% %12.5f %12.5f %12.5f %12.5f %12.5f" + " %12.5f" * len(quantiles)) % (
+            (i,) + (row[0], row[1] * 100) + row[2:]
+        ), file=file)
+
+    print("", file=file)
+    print("Devices", file=file)
+    print("%6s %10s %12s" % ("ID", "Processed", "UsageRate"), file=file)
+    for i, (c, rate) in enumerate(zip(dc.list_proceeded(), dc.list_work_rate())):
+        print("%6s %10s %11.5f%%" % (i, c, rate * 100), file=file)
+
+    print("", file=file)
+    print("Seed:            %s" % system.seed, file=file)
+    print("Model time:      %.5f" % system.t, file=file)
+    if system.warmup is not None:
+        print("Warm-up end:     %.5f" % system.warmup, file=file)
+    print("Packages:        %s" % system.b.packages, file=file)
+    print("Processed:       %s" % dc.processed(), file=file)
+    print("Acceptance rate: %.5f%%" % ((system.acceptance_rate() if system.b.packages > 0 else 0) * 100), file=file)
+    print("Drop rate:       %.5f%%" % (system.drop_rate() * 100), file=file)
+    print("Events:          %s" % events, file=file)
+    print("Elapsed:         %.3fs" % elapsed, file=file)
+    print("Events/sec:      %.0f" % (events / elapsed if elapsed > 0 else 0), file=file)
+
+    if system.instrumentation is not None:
+        r = system.instrumentation.snapshot()
+        print("", file=file)
+        print("Event counts", file=file)
+        for name, n in r["counts"].items():
+            print("%16s %12s" % (name, n), file=file)
+        print("", file=file)
+        print("Phase time (sampled %s of %s ticks, scaled)" % (r["sampled"], r["ticks"]), file=file)
+        for name, t in r["estimated_time"].items():
+            print("%16s %11.3fs" % (name, t), file=file)
+
+
+def run_network(network, limit):
+    network.reset(limit)
+
+    start = time.perf_counter()
+    events = network.run_events()
+    elapsed = time.perf_counter() - start
+
+    return events, elapsed
+
+
+def report_network(network, events, elapsed, file=None):
+    print("Stages", file=file)
+    print("%6s %8s %8s %10s %12s %12s %12s %12s %12s" % (
+        "ID", "Buffer", "Devices", "Arrived", "DropRate", "UsageRate", "AvgStage", "AvgBuffer", "AvgProcess"
+    ), file=file)
+    for stage in network.stages:
+        print("%6s %8s %8s %10s %11.5f%% %11.5f%% %12.5f %12.5f %12.5f" % (
+            stage.id, stage.b.size, len(stage.dc), stage.b.packages, stage.drop_rate() * 100,
+            stage.usage_rate() * 100, stage.stage_time(), stage.buffer_time(), stage.processing_time()
+        ), file=file)
+
+    print("", file=file)
+    print("Seed:            %s" % network.seed, file=file)
+    print("Model time:      %.5f" % network.t, file=file)
+    print("Packages:        %s" % network.sc.count(), file=file)
+    print("Completed:       %s" % network.completed, file=file)
+    print("Drop rate:       %.5f%%" % (network.drop_rate() * 100), file=file)
+    print("AvgSystem:       %.5f" % network.system_time(), file=file)
+    print("Events:          %s" % events, file=file)
+    print("Elapsed:         %.3fs" % elapsed, file=file)
+    print("Events/sec:      %.0f" % (events / elapsed if elapsed > 0 else 0), file=file)
@@ -0,0 +1,55 @@
+import heapq
+import itertools
+
+
+class Schedule:
+    def __init__(self):
+        self.heap = []
+        self.entries = {}
+        self.counter = itertools.count()
+
+    def reset(self):
+        self.heap = []
+        self.entries = {}
+        self.counter = itertools.count()
+
+    def __getstate__(self):
+        n = next(self.counter)
+        self.counter = itertools.count(n)
+        return self.heap, self.entries, n
+
+    def __setstate__(self, state):
+        self.heap, self.entries, n = state
+        self.counter = itertools.count(n)
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, item):
+        return item in self.entries
+
+    def push(self, item, t, rank=0):
+        self.remove(item)
+        entry = [t, rank, next(self.counter), item]
+        self.entries[item] = entry
+        heapq.heappush(self.heap, entry)
+
+    def remove(self, item):
+        entry = self.entries.pop(item, None)
+        if entry:
+            entry[-1] = None
+
+    def peek(self):
+        heap = self.heap
+        while heap and heap[0][-1] is None:
+            heapq.heappop(heap)
+        if not heap:
+            return None
+        return heap[0][-1], heap[0][0]
+
+    def pop(self):
+        r = self.peek()
+        if r:
+            entry = heapq.heappop(self.heap)
+            del self.entries[entry[-1]]
+        return r
@@ -0,0 +1,178 @@
+from SMO import kernel
+from SMO.stats import Estimate, mser
+from SMO.system import System
+
+default_metrics = ("drop_rate", "system_time", "usage_rate")
+
+statistics = {
+    "system_time": "ts",
+    "buffer_time": "tb",
+    "processing_time": "tp",
+}
+
+names = ("drop_rate", "usage_rate") + tuple(statistics)
+
+
+def totals(system):
+    sources = system.sc.sources
+    r = {
+        "t": system.t,
+        "packages": system.b.packages,
+        "dropped": system.b.dropped,
+        "work": system.dc.sum_work_time(),
+    }
+    for m, name in statistics.items():
+        values = [getattr(s, name) for s in sources]
+        r[m] = (sum(v.n for v in values), sum(v.mean * v.n for v in values))
+    return r
+
+
+def batch_means(a, b, devices):
+    packages = b["packages"] - a["packages"]
+    t = b["t"] - a["t"]
+    r = {
+        "drop_rate": (b["dropped"] - a["dropped"]) / packages if packages > 0 else 0.0,
+        "usage_rate": (b["work"] - a["work"]) / (t * devices) if t > 0 else 0.0,
+    }
+    for m in statistics:
+        n = b[m][0] - a[m][0]
+        r[m] = (b[m][1] - a[m][1]) / n if n > 0 else 0.0
+    return r
+
+
+class Warmup:
+    def __init__(self, system, metric="system_time", every=100, batch=5, min_observations=100):
+        if metric not in names:
+            raise ValueError("Unknown metric: %s" % metric)
+        self.system = system
+        self.metric = metric
+        self.every = every
+        self.batch = batch
+        self.min_observations = min_observations
+        self.reset()
+
+    def reset(self):
+        self.observations = []
+        self.marks = [self.system.mark()]
+        self.t = None
+        self.mark = totals(self.system)
+        self.boundary = self.system.sc.count() + self.every
+
+    def update(self):
+        count = self.system.sc.count()
+        if self.t is not None or count < self.boundary:
+            return False
+
+        r = totals(self.system)
+        self.observations.append(batch_means(self.mark, r, len(self.system.dc))[self.metric])
+        self.marks.append(self.system.mark())
+        self.mark = r
+        self.boundary = count + self.every
+        if len(self.observations) < self.min_observations:
+            return False
+
+        d = mser(self.observations, self.batch)
+        if d is None:
+            return False
+        mark = self.marks[d]
+        self.t = mark[0]
+        self.marks = []
+        if d > 0:
+            self.system.truncate_statistics(mark)
+        else:
+            self.system.warmup = self.t
+        return True
+
+    def run(self):
+        system = self.system
+        events = 0
+        while system.running:
+            events += kernel.run_events(system, max(self.boundary - system.sc.count(), 1))
+            if self.update():
+                break
+        return events
+
+
+class Sequential:
+    def __init__(
+        self, system, metrics=default_metrics, precision=0.05, level=0.95, batch=1000, min_batches=10,
+        relative=True, warmup=False
+    ):
+        unknown = set(metrics) - set(names)
+        if unknown:
+            raise ValueError("Unknown metrics: %s" % ", ".join(sorted(unknown)))
+        self.system = system
+        self.metrics = tuple(metrics)
+        self.precision = precision
+        self.level = level
+        self.batch = batch
+        self.min_batches = min_batches
+        self.relative = relative
+        self.warmup = warmup
+        self.reset()
+
+    def reset(self):
+        self.batches = []
+        self.truncated = None if self.warmup else 0
+        self.marks = [self.system.mark()] if self.warmup else []
+        self.mark = totals(self.system)
+        self.boundary = self.system.sc.count() + self.batch
+
+    def update(self):
+        count = self.system.sc.count()
+        if count < self.boundary:
+            return False
+
+        r = totals(self.system)
+        self.batches.append(batch_means(self.mark, r, len(self.system.dc)))
+        self.mark = r
+        if self.truncated is None:
+            self.marks.append(self.system.mark())
+        self.boundary = count + self.batch
+        if self.truncated is None:
+            self.truncate()
+        return self.satisfied()
+
+    def truncate(self):
+        points = [mser([b[m] for b in self.batches], 1) for m in self.metrics]
+        if any(d is None for d in points):
+            return
+        self.truncated = max(points)
+        self.batches = self.batches[self.truncated:]
+        mark = self.marks[self.truncated]
+        self.marks = []
+        if self.truncated > 0:
+            self.system.truncate_statistics(mark)
+        else:
+            self.system.warmup = mark[0]
+        self.mark = totals(self.system)
+
+    def estimates(self):
+        return {m: Estimate([b[m] for b in self.batches], self.level) for m in self.metrics}
+
+    def target(self, estimate):
+        return self.precision * abs(estimate.mean) if self.relative else self.precision
+
+    def satisfied(self):
+        if self.truncated is None or len(self.batches) < max(self.min_batches, 2):
+            return False
+        return all(e.half_width() <= self.target(e) for e in self.estimates().values())
+
+    def run(self, limit=10 ** 9):
+        system = self.system
+        system.reset(limit)
+        self.reset()
+        while system.running:
+            kernel.run_events(system, max(self.boundary - system.sc.count(), 1))
+            if self.update():
+                break
+        return self.estimates()
+
+
+def estimate(ss, bs, ds, seed=None, limit=10 ** 9, metrics=default_metrics, precision=0.05, level=0.95,
+             batch=1000, min_batches=10, relative=True, warmup=False, **kwargs):
+    system = System(ss, bs, ds, seed, **kwargs)
+    system.logging = False
+    system.fast_forward = True
+    rule = Sequential(system, metrics, precision, level, batch, min_batches, relative, warmup)
+    return system, rule, rule.run(limit)
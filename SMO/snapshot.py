@@ -0,0 +1,133 @@
+import colorsys
+
+from matplotlib.collections import PolyCollection
+
+from SMO.eventlog import Event
+
+
+def hsv2rgb2hex(h, s, v):
+    r, g, b = tuple(round(i * 255) for i in colorsys.hsv_to_rgb(h / 360, s / 100, v / 100))
+    return '#%02x%02x%02x' % (int(r), int(g), int(b))
+
+
+def source_colors(n):
+    return [
+        [hsv2rgb2hex(i * 360 / n, 70, 75) for i in range(n)],
+        [hsv2rgb2hex(i * 360 / n, 70, 65) for i in range(n)],
+    ]
+
+
+class Snapshot:
+    def __init__(self, system, start=0, end=None, run=0, estimates=None):
+        sc = system.sc
+        dc = system.dc
+        log = system.backlog
+
+        self.run = run
+        self.t = system.t
+        self.limit = system.limit
+        self.running = system.running
+        self.sources = len(sc.sources)
+        self.devices = len(dc.devices)
+        self.buffer = system.b.size
+        self.dropped_rate = sc.dropped_rate()
+        self.estimates = estimates
+
+        self.source_rows = tuple(zip(
+            sc.list_count(), sc.list_dropped_rate(), sc.list_system_time(),
+            sc.list_buffer_time(), sc.list_buffer_time_dispersion(),
+            sc.list_processing_time(), sc.list_processing_time_dispersion()
+        ))
+        n = max(self.sources, 1)
+        self.source_total = (sum(r[0] for r in self.source_rows),) + tuple(
+            sum(r[i] for r in self.source_rows) / n for i in range(1, 7)
+        )
+        self.device_rows = tuple(zip(
+            dc.list_proceeded(), dc.list_pointer(), dc.list_status(), dc.list_work_rate()
+        ))
+        self.device_total = (
+            sum(r[0] for r in self.device_rows), '', '',
+            sum(r[3] for r in self.device_rows) / max(self.devices, 1)
+        )
+
+        self.empty = not len(log)
+        if end is None:
+            end = log.t[len(log) - 1] if len(log) else 0.0
+        self.start = start
+        self.end = end
+
+        lo, hi = log.bounds(start, end)
+        self.events = tuple(c.copy() for c in log.columns(lo, hi))
+        event, t, source, value = log.columns(max(0, lo - 1), hi)
+        m = event == Event.QUEUE
+        self.queue = t[m], value[m]
+        self.intervals = tuple(
+            tuple(log.intervals.window(i, start, end, system.t)) for i in range(self.devices)
+        )
+
+    def graph_device(self, x):
+        if self.empty:
+            return
+
+        cats = range(1, self.devices + 1)
+        colors = source_colors(self.sources)
+        colormap = []
+        verts = []
+
+        for i in range(self.devices):
+            for n, a, b, src in self.intervals[i]:
+                v = [
+                    (a, cats[i] - .4),
+                    (a, cats[i] + .4),
+                    (b, cats[i] + .4),
+                    (b, cats[i] - .4),
+                    (a, cats[i] - .4),
+                ]
+                verts += [v]
+                colormap += [colors[n % 2][src]]
+
+        bars = PolyCollection(verts, facecolors=colormap)
+        x.add_collection(bars)
+
+        x.set_title("Активность устройств")
+        x.set_yticks([i + 1 for i in range(self.devices)])
+        x.set_yticklabels([i + 1 for i in range(self.devices)])
+        x.set_ylim(0.5, self.devices + 0.5)
+        x.set_xlim(self.start, self.end)
+
+        return colors[0]
+
+    def graph_buffer(self, x):
+        if self.empty:
+            return
+
+        event, t, source, value = self.events
+        num = source + 1
+
+        def points(e):
+            m = event == e
+            return t[m], num[m]
+
+        x.scatter(*points(Event.READY), color='b', marker='v')
+        x.scatter(*points(Event.BUSY), color='b', marker='>')
+        x.scatter(*points(Event.PLACE), color='g', marker='o')
+        x.scatter(*points(Event.DROP), color='r', marker='x')
+        x.scatter(*points(Event.CHANGE), color='y', marker='.')
+
+        x.set_title("События источников")
+        x.set_yticks([i + 1 for i in range(self.sources)])
+        x.set_yticklabels([i + 1 for i in range(self.sources)])
+        x.set_ylim(0.5, self.sources + 0.5)
+        x.set_xlim(self.start, self.end)
+
+    def graph_queue(self, x):
+        if self.empty:
+            return
+
+        x.plot(*self.queue)
+
+        x.set_title("Размер очереди по времени")
+        x.set_yticks([i + 1 for i in range(self.buffer)])
+        x.set_yticklabels([i + 1 for i in range(self.buffer)])
+        x.set_xlim(self.start, self.end)
+        x.set_ylim(0, self.buffer)
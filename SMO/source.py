@@ -1,81 +1,116 @@
 import random
 
+from SMO.schedule import Schedule
+from SMO.distribution import Distribution, per_entity
+from SMO.stats import Statistic
+from SMO.variate import Variates
 
-def iterative_dispersion(s, s2, n):
-    if n < 2:
-        return 0
-    else:
-        return (s2 - (s**2) / n)/(n - 1)
+default_quantiles = ()
 
 
 class Source:
-    def __init__(self, id):
+    __slots__ = ("id", "dt", "distribution", "stream", "count", "dropped", "t", "tb", "tp", "ts")
+
+    def __init__(self, id, dt=0.25, quantiles=default_quantiles, histogram=None):
         self.id = id
         #self.dt = 0.3 + 0.5 * random.random()
-        self.dt = 0.25
+        self.dt = dt
+        self.distribution = None
+        self.stream = None
+        if isinstance(dt, Distribution):
+            self.dt = dt.mean()
+            self.distribution = dt
 
         self.count = 0
         self.dropped = 0
         self.t = 0.0
 
-        self.tb = [0, 0.0, 0.0, 0.0]
-        self.tp = [0, 0.0, 0.0, 0.0]
-        self.ts = [0, 0.0, 0.0, 0.0]
+        self.tb = Statistic()
+        self.tp = Statistic()
+        self.ts = Statistic(quantiles, histogram)
 
     def __iter__(self):
         return self
 
     def __next__(self):
         self.count += 1
-        self.t += self.dt
+        if self.stream is not None:
+            self.t += self.stream()
+        elif self.distribution is not None:
+            self.t += self.distribution.sample()
+        else:
+            self.t += self.dt
         return self.t
 
     def reset(self):
+        self.t = 0.0
+        self.reset_statistics()
+
+    def reset_statistics(self):
         self.count = 0
         self.dropped = 0
-        self.t = 0.0
 
-        self.tb = [0, 0.0, 0.0, 0.0]
-        self.tp = [0, 0.0, 0.0, 0.0]
-        self.ts = [0, 0.0, 0.0, 0.0]
+        self.tb.reset()
+        self.tp.reset()
+        self.ts.reset()
+
+    def mark(self):
+        return self.count, self.dropped, self.tb.state(), self.tp.state(), self.ts.state()
+
+    def truncate(self, mark):
+        count, dropped, tb, tp, ts = mark
+        self.count -= count
+        self.dropped -= dropped
+
+        self.tb.truncate(tb)
+        self.tp.truncate(tp)
+        self.ts.truncate(ts)
 
     def add_buffer_time(self, x):
-        self.tb[0] += 1
-        self.tb[1] += (x - self.tb[1]) / self.tb[0]
-        self.tb[2] += x
-        self.tb[3] += x ** 2
+        self.tb.add(x)
 
     def buffer_time_dispersion(self):
-        return iterative_dispersion(self.tb[2], self.tb[3], self.tb[0])
+        return self.tb.variance()
 
     def add_processing_time(self, x):
-        self.tp[0] += 1
-        self.tp[1] += (x - self.tp[1]) / self.tp[0]
-        self.tp[2] += x
-        self.tp[3] += x ** 2
+        self.tp.add(x)
 
     def processing_time_dispersion(self):
-        return iterative_dispersion(self.tp[2], self.tp[3], self.tp[0])
+        return self.tp.variance()
 
     def add_system_time(self, x):
-        self.ts[0] += 1
-        self.ts[1] += (x - self.ts[1]) / self.ts[0]
-        self.ts[2] += x
-        self.ts[3] += x ** 2
+        self.ts.add(x)
 
     def system_time_dispersion(self):
-        return iterative_dispersion(self.ts[2], self.ts[3], self.ts[0])
+        return self.ts.variance()
 
 
 class SourceController:
-    def __init__(self, size):
-        self.sources = [Source(i) for i in range(size)]
+    def __init__(self, size, interval=0.25, quantiles=default_quantiles, histogram=None):
+        self.sources = [
+            Source(i, dt, quantiles, histogram) for i, dt in enumerate(per_entity(interval, size))
+        ]
         self.t = 0.0
+        self.generated = 0
+        self.schedule = Schedule()
+        self.update_schedule()
 
     def reset(self):
         self.t = 0.0
+        self.generated = 0
         for s in self.sources:
             s.reset()
+        self.update_schedule()
+
+    def set_streams(self, generators, block=256):
+        for s, g in zip(self.sources, generators):
+            if s.distribution is not None:
+                s.stream = Variates(g, s.distribution.block, block)
+
+    def update_schedule(self):
+        self.schedule.reset()
+        for s in self.sources:
+            self.schedule.push(s, s.t, s.id)
 
     def __iter__(self):
         return self
@@ -84,13 +119,10 @@ class SourceController:
         return len(self.sources)
 
     def min(self):
-        timings = {}
-        for s in self.sources:
-            timings[s] = s.t
-        return min(timings, key=timings.get)
+        return self.schedule.peek()[0]
 
     def count(self):
-        return sum((s.count for s in self.sources))
+        return self.generated
 
     def dropped(self):
         return sum((s.dropped for s in self.sources))
@@ -98,35 +130,43 @@ class SourceController:
     def list_count(self):
         return [s.count for s in self.sources]
 
+    def packages(self):
+        return sum((s.count for s in self.sources))
+
     def dropped_rate(self):
-        return (self.dropped() / self.count()) if (self.count() > 0) else 0
+        packages = self.packages()
+        return (self.dropped() / packages) if (packages > 0) else 0
 
     def list_dropped_rate(self):
         return [(s.dropped / s.count) if (s.count > 0) else 0 for s in self.sources]
 
     def list_buffer_time(self):
-        return [s.tb[1] for s in self.sources]
+        return [s.tb.mean for s in self.sources]
 
     def list_buffer_time_dispersion(self):
         return [s.buffer_time_dispersion() for s in self.sources]
 
     def list_processing_time(self):
-        return [s.tp[1] for s in self.sources]
+        return [s.tp.mean for s in self.sources]
 
     def list_processing_time_dispersion(self):
         return [s.processing_time_dispersion() for s in self.sources]
 
     def list_system_time(self):
-        return [s.ts[1] for s in self.sources]
+        return [s.ts.mean for s in self.sources]
 
     def list_system_time_dispersion(self):
         return [s.system_time_dispersion() for s in self.sources]
 
+    def list_system_time_quantile(self, p):
+        return [s.ts.quantile(p) for s in self.sources]
+
     def __next__(self):
         m = self.min()
         next(m)
-        m = self.min()
-        r = (m, m.t)
+        self.generated += 1
+        self.schedule.push(m, m.t, m.id)
+        r = self.schedule.peek()
         self.t = r[1]
         return r
 
@@ -0,0 +1,307 @@
+import bisect
+import functools
+import math
+import statistics
+
+import numpy as np
+
+
+class P2Quantile:
+    __slots__ = ("p", "n", "q", "pos", "desired", "increments")
+
+    def __init__(self, p):
+        self.p = p
+        self.reset()
+
+    def reset(self):
+        p = self.p
+        self.n = 0
+        self.q = []
+        self.pos = [1, 2, 3, 4, 5]
+        self.desired = [1.0, 1.0 + 2.0 * p, 1.0 + 4.0 * p, 3.0 + 2.0 * p, 5.0]
+        self.increments = [0.0, p / 2.0, p, (1.0 + p) / 2.0, 1.0]
+
+    def add(self, x):
+        q = self.q
+        self.n += 1
+        if self.n <= 5:
+            bisect.insort(q, x)
+            return
+
+        pos = self.pos
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = bisect.bisect_right(q, x) - 1
+
+        for i in range(k + 1, 5):
+            pos[i] += 1
+        desired = self.desired
+        for i in range(5):
+            desired[i] += self.increments[i]
+
+        for i in (1, 2, 3):
+            d = desired[i] - pos[i]
+            if (d >= 1.0 and pos[i + 1] - pos[i] > 1) or (d <= -1.0 and pos[i - 1] - pos[i] < -1):
+                d = 1 if d > 0 else -1
+                qp = q[i] + d / (pos[i + 1] - pos[i - 1]) * (
+                    (pos[i] - pos[i - 1] + d) * (q[i + 1] - q[i]) / (pos[i + 1] - pos[i]) +
+                    (pos[i + 1] - pos[i] - d) * (q[i] - q[i - 1]) / (pos[i] - pos[i - 1])
+                )
+                if not q[i - 1] < qp < q[i + 1]:
+                    qp = q[i] + d * (q[i + d] - q[i]) / (pos[i + d] - pos[i])
+                q[i] = qp
+                pos[i] += d
+
+    def value(self):
+        if self.n == 0:
+            return math.nan
+        if self.n <= 5:
+            return self.q[min(self.n - 1, int(round((self.n - 1) * self.p)))]
+        return self.q[2]
+
+
+class Histogram:
+    __slots__ = ("low", "high", "bins", "width", "counts")
+
+    def __init__(self, low, high, bins):
+        if high <= low or bins < 1:
+            raise ValueError("Histogram needs low < high and at least one bin")
+        self.low = float(low)
+        self.high = float(high)
+        self.bins = int(bins)
+        self.width = (self.high - self.low) / self.bins
+        self.counts = [0] * (self.bins + 2)
+
+    def reset(self):
+        self.counts = [0] * (self.bins + 2)
+
+    def add(self, x):
+        i = int((x - self.low) // self.width) + 1
+        if i < 0:
+            i = 0
+        elif i > self.bins:
+            i = self.bins + 1
+        self.counts[i] += 1
+
+    def edges(self):
+        return [self.low + i * self.width for i in range(self.bins + 1)]
+
+    def merge(self, other):
+        if (self.low, self.high, self.bins) != (other.low, other.high, other.bins):
+            raise ValueError("Cannot merge histograms with different bins")
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+
+    def quantile(self, p):
+        n = sum(self.counts)
+        if n == 0:
+            return math.nan
+        target = p * n
+        c = 0
+        for i, k in enumerate(self.counts):
+            if k and c + k >= target:
+                if i == 0:
+                    return self.low
+                if i == self.bins + 1:
+                    return self.high
+                return self.low + (i - 1 + (target - c) / k) * self.width
+            c += k
+        return self.high
+
+
+class Statistic:
+    __slots__ = ("n", "mean", "m2", "quantiles", "sketches", "histogram")
+
+    def __init__(self, quantiles=(), histogram=None):
+        self.quantiles = tuple(quantiles)
+        self.histogram = Histogram(*histogram) if histogram else None
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.sketches = [P2Quantile(p) for p in self.quantiles]
+        if self.histogram:
+            self.histogram.reset()
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+        if self.sketches:
+            for s in self.sketches:
+                s.add(x)
+        if self.histogram:
+            self.histogram.add(x)
+
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else 0
+
+    def state(self):
+        return self.n, self.mean, self.m2, list(self.histogram.counts) if self.histogram else None
+
+    def truncate(self, state):
+        n0, mean0, m20, counts = state
+        n = self.n - n0
+        if n > 0:
+            mean = (self.n * self.mean - n0 * mean0) / n
+            delta = mean - mean0
+            self.m2 = max(self.m2 - m20 - delta * delta * n0 * n / self.n, 0.0)
+            self.mean = mean
+        else:
+            self.mean = 0.0
+            self.m2 = 0.0
+        self.n = max(n, 0)
+        self.sketches = None
+        if self.histogram:
+            self.histogram.counts = [a - b for a, b in zip(self.histogram.counts, counts)]
+
+    def quantile(self, p):
+        if self.sketches is not None and p in self.quantiles:
+            return self.sketches[self.quantiles.index(p)].value()
+        if self.histogram:
+            return self.histogram.quantile(p)
+        if p in self.quantiles:
+            return math.nan
+        raise ValueError("Quantile %s is not tracked" % p)
+
+    def merge(self, other):
+        n = self.n + other.n
+        if n > 0:
+            delta = other.mean - self.mean
+            self.m2 += other.m2 + delta * delta * self.n * other.n / n
+            self.mean += delta * other.n / n
+        self.n = n
+        self.sketches = None
+        if self.histogram and other.histogram:
+            self.histogram.merge(other.histogram)
+        return self
+
+    def copy(self):
+        r = Statistic(self.quantiles, None)
+        r.n = self.n
+        r.mean = self.mean
+        r.m2 = self.m2
+        r.sketches = None
+        if self.histogram:
+            h = self.histogram
+            r.histogram = Histogram(h.low, h.high, h.bins)
+            r.histogram.counts = list(h.counts)
+        return r
+
+
+def merged(values):
+    values = list(values)
+    if not values:
+        return Statistic()
+    r = values[0].copy()
+    for s in values[1:]:
+        r.merge(s)
+    return r
+
+
+def beta_fraction(a, b, x):
+    tiny = 1e-300
+    c = 1.0
+    d = 1.0 - (a + b) * x / (a + 1.0)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    r = d
+    for m in range(1, 10000):
+        for k in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                  -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1.0 + k * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + k / c
+            c = c if abs(c) > tiny else tiny
+            r *= c * d
+        if abs(c * d - 1.0) < 1e-15:
+            break
+    return r
+
+
+def betainc(a, b, x):
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    front = math.exp(
+        math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log1p(-x)
+    )
+    if x < (a + 1.0) / (a + b + 2.0):
+        return front * beta_fraction(a, b, x) / a
+    return 1.0 - front * beta_fraction(b, a, 1.0 - x) / b
+
+
+def t_cdf(t, df):
+    tail = 0.5 * betainc(df / 2.0, 0.5, df / (df + t * t))
+    return 1.0 - tail if t > 0 else tail
+
+
+@functools.lru_cache(maxsize=256)
+def t_quantile(p, df):
+    if p == 0.5:
+        return 0.0
+    if p < 0.5:
+        return -t_quantile(1.0 - p, df)
+    lo = 0.0
+    hi = max(2.0, statistics.NormalDist().inv_cdf(p) * 2.0)
+    while t_cdf(hi, df) < p:
+        lo, hi = hi, hi * 2.0
+    for _ in range(200):
+        mid = (lo + hi) / 2.0
+        if t_cdf(mid, df) < p:
+            lo = mid
+        else:
+            hi = mid
+        if hi - lo < 1e-12 * hi:
+            break
+    return (lo + hi) / 2.0
+
+
+class Estimate:
+    def __init__(self, samples, level=0.9):
+        self.n = len(samples)
+        self.level = level
+        self.mean = statistics.fmean(samples) if samples else 0.0
+        self.variance = statistics.variance(samples) if self.n > 1 else 0.0
+
+    def half_width(self):
+        if self.n < 2:
+            return math.inf
+        t = t_quantile((1 + self.level) / 2, self.n - 1)
+        return t * math.sqrt(self.variance / self.n)
+
+    def interval(self):
+        h = self.half_width()
+        return self.mean - h, self.mean + h
+
+
+def mser(values, batch=5):
+    y = np.asarray(values, dtype=np.float64)
+    m = len(y) // batch
+    if m < 4:
+        return None
+    z = y[:m * batch].reshape(m, batch).mean(axis=1)
+
+    statistic = np.empty(m)
+    n = 0
+    mean = 0.0
+    m2 = 0.0
+    values = z.tolist()
+    for i in range(m - 1, -1, -1):
+        n += 1
+        delta = values[i] - mean
+        mean += delta / n
+        m2 += delta * (values[i] - mean)
+        statistic[i] = m2 / (n * n)
+
+    d = int(np.argmin(statistic[:m // 2]))
+    if d == m // 2 - 1:
+        return None
+    return d * batch
@@ -0,0 +1,129 @@
+import itertools
+import json
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from SMO.replication import Estimate, metrics, run_replication, spawn_seeds
+
+defaults = {
+    "sources": 5,
+    "buffer": 10,
+    "devices": 56,
+    "limit": 1000,
+    "interval": 0.25,
+    "service": (0.25, 1.0),
+}
+
+
+def grid(**axes):
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[n] for n in names))]
+
+
+def normalize(config):
+    unknown = set(config) - set(defaults)
+    if unknown:
+        raise ValueError("Unknown sweep parameters: %s" % ", ".join(sorted(unknown)))
+    r = dict(defaults)
+    r.update(config)
+    return r
+
+
+def point_key(config):
+    return json.dumps(config, sort_keys=True, default=repr)
+
+
+def run_key(config, replications, seed, level):
+    return point_key(dict(config, replications=replications, seed=seed, level=level))
+
+
+def row_key(row):
+    return run_key({k: row[k] for k in defaults}, row["replications"], row["seed"], row["level"])
+
+
+def run_point(config, replications, seed, level=0.9):
+    key = point_key(config)
+    seeds = spawn_seeds([seed, zlib.crc32(key.encode())], replications)
+    samples = [
+        run_replication(
+            config["sources"], config["buffer"], config["devices"], config["limit"], s,
+            interval=config["interval"], service=config["service"]
+        )
+        for s in seeds
+    ]
+
+    row = dict(config)
+    for m in metrics:
+        e = Estimate([s[m] for s in samples], level)
+        row[m] = e.mean
+        row[m + "_hw"] = e.half_width()
+    row["replications"] = replications
+    row["seed"] = seed
+    row["level"] = level
+    row["events"] = sum(s["events"] for s in samples)
+    row["elapsed"] = sum(s["elapsed"] for s in samples)
+    return row
+
+
+def load_cache(path):
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path) as file:
+        for line in file:
+            try:
+                row = json.loads(line)
+                done[row_key(row)] = row
+            except (ValueError, KeyError):
+                continue
+    return done
+
+
+def columns(rows):
+    r = {}
+    for name in rows[0] if rows else ():
+        values = [row[name] for row in rows]
+        if any(not isinstance(v, (int, float, str)) for v in values):
+            values = [json.dumps(v, default=repr) for v in values]
+        r[name] = np.array(values)
+    return r
+
+
+def save(path, rows):
+    with open(path, "wb") as file:
+        np.savez(file, **columns(rows))
+
+
+def load(path):
+    with np.load(path) as data:
+        return {k: data[k] for k in data.files}
+
+
+def sweep(configs, path, replications=1, seed=0, workers=None, level=0.9, progress=None):
+    configs = [normalize(c) for c in configs]
+    keys = [run_key(c, replications, seed, level) for c in configs]
+
+    cache = path + ".cache"
+    done = load_cache(cache)
+    pending = [(k, c) for k, c in zip(keys, configs) if k not in done]
+    pending = list(dict(pending).items())
+
+    finished = len(configs) - len(pending)
+    if pending:
+        with open(cache, "a") as file, ProcessPoolExecutor(workers) as pool:
+            tasks = [pool.submit(run_point, c, replications, seed, level) for _, c in pending]
+            for task in as_completed(tasks):
+                row = task.result()
+                file.write(json.dumps(row, default=repr) + "\n")
+                file.flush()
+                done[row_key(row)] = row
+                finished += 1
+                if progress:
+                    progress(finished, len(configs), row)
+
+    rows = [done[k] for k in keys]
+    save(path, rows)
+    return rows
@@ -1,223 +1,130 @@
 from SMO.buffer import Buffer
 from SMO.device import DeviceController, Status
-from SMO.source import SourceController
+from SMO.eventlog import Event, EventLog
+from SMO.instrument import Instrumentation, wrapped
+from SMO.snapshot import Snapshot
+from SMO.source import SourceController, default_quantiles
+from SMO.variate import entity_streams, substreams
 
 import matplotlib.pyplot as plt
-from matplotlib.collections import PolyCollection
-import colorsys
 import random
 from datetime import datetime
 
 
-def hsv2rgb2hex(h, s, v):
-    r, g, b = tuple(round(i * 255) for i in colorsys.hsv_to_rgb(h / 360, s / 100, v / 100))
-    return '#%02x%02x%02x' % (int(r), int(g), int(b))
-
-
 class System:
-    def __init__(self, ss, bs, ds):
-        self.sc = SourceController(ss)
+    def __init__(
+        self, ss, bs, ds, seed=None, interval=0.25, service=(0.25, 1.0), streams=False,
+        quantiles=default_quantiles, histogram=None
+    ):
+        self.sc = SourceController(ss, interval, quantiles, histogram)
         self.b = Buffer(bs)
-        self.dc = DeviceController(ds)
-        self.seed = datetime.now()
+        self.dc = DeviceController(ds, service)
+        self.seed = seed if seed is not None else int(datetime.now().timestamp() * 1000000)
+        self.streams = streams
         random.seed(self.seed)
+        if self.streams:
+            self.seed_streams()
         self.timings = {
             self.sc: (self.sc.sources[0], 0.0),
             self.dc: (self.dc.devices[0], 0.0)
         }
         self.t = 0
         self.limit = 0
+        self.warmup = None
         self.running = False
-        self.backlog = []
-        self.backlog_bounds = None
+        self.fast_forward = False
+        self.logging = True
+        self.backlog = EventLog()
+        self.sink = None
+        self.instrumentation = None
 
     def reset(self, limit):
         self.limit = limit
         self.running = True
 
         self.t = 0
-        self.backlog = []
-        self.backlog_bounds = None
+        self.warmup = None
+        self.backlog.reset()
         random.seed(self.seed)
 
         self.sc.reset()
         self.b.reset()
         self.dc.reset()
+        if self.streams:
+            self.seed_streams()
 
         self.timings = {
             self.sc: (self.sc.sources[0], 0.0),
             self.dc: (self.dc.devices[0], 0.0)
         }
-
-    def save(self, caller, event):
-        self.backlog += [(caller, self.t, event)]
+        if self.fast_forward:
+            self.halt_idle_devices()
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        for name in wrapped:
+            state.pop(name, None)
+        state["sink"] = None
+        state["instrumentation"] = None
+        state["random"] = random.getstate()
+        return state
+
+    def __setstate__(self, state):
+        random.setstate(state.pop("random"))
+        self.__dict__.update(state)
+
+    def instrument(self, sample=64, callback=None, every=10000):
+        return Instrumentation(sample, callback, every).attach(self)
+
+    def mark(self):
+        return (
+            self.t, [s.mark() for s in self.sc.sources], [d.mark(self.t) for d in self.dc.devices], self.b.mark()
+        )
+
+    def truncate_statistics(self, mark):
+        t, sources, devices, b = mark
+        self.warmup = t
+        for s, m in zip(self.sc.sources, sources):
+            s.truncate(m)
+        for d, m in zip(self.dc.devices, devices):
+            d.truncate(m, t)
+        self.b.truncate(b)
+
+    def halt_idle_devices(self):
+        for d in self.dc.devices:
+            if d.status == Status.READY:
+                d.t = self.t
+                d.status = Status.HALT
+                self.dc.update(d)
+        self.timings[self.dc] = next(self.dc)
+
+    def seed_streams(self):
+        sources, devices = entity_streams(self.seed)
+        self.sc.set_streams(substreams(sources, len(self.sc), self.streams))
+        self.dc.set_streams(substreams(devices, len(self.dc), self.streams))
+
+    def save(self, event, source, value=-1):
+        if self.logging:
+            self.backlog.append(event, self.t, source, value)
+        if self.sink is not None:
+            self.sink.append(event, self.t, source, value)
 
     def print(self):
         with open('out.txt', 'w') as file:
-            for log in self.backlog:
-                file.write("%s | %.4f | %s\n" % log)
+            for line in self.backlog.lines():
+                file.write(line + "\n")
 
-    def graph_device(self, x, start=0, end=None):
-        if end is None:
-            end = self.backlog[-1][1]
+    def snapshot(self, start=0, end=None, run=0, estimates=None):
+        return Snapshot(self, start, end, run, estimates)
 
-        devices = [[] for _ in range(len(self.dc.devices))]
-        status = [False for _ in range(len(self.dc.devices))]
-
-        bound = 0
-        if not self.backlog_bounds:
-            if len(self.backlog) > 0:
-                self.backlog_bounds = [0, len(self.backlog)]
-            else:
-                return
-
-        i = self.backlog_bounds[0]
-        while i < self.backlog_bounds[1]:
-            if (self.backlog[i][1] < start - 5) or (self.backlog[i][1] > end):
-                if self.backlog[i][1] < max(0, start - 5):
-                    bound = i
-                i += 1
-                continue
-            self.backlog_bounds = [bound, len(self.backlog)]
-
-            if self.backlog[i][0][0] == 'D':
-                num = int(self.backlog[i][2][0])
-                src = int(self.backlog[i][0][1:])
-                if (self.backlog[i][2][1] == "Busy.") and not status[num]:
-                    devices[num] += [[self.backlog[i][1], self.t, src]]
-                    status[num] = True
-                if self.backlog[i][2][1] == "Ready." and status[num]:
-                    devices[num][-1][1] = self.backlog[i][1]
-                    status[num] = False
-
-            i += 1
-
-        cats = range(1, len(self.dc.devices) + 1)
-        colors = [[], []]
-        colors[0] = [hsv2rgb2hex(i * 360 / len(self.sc.sources), 70, 75) for i in range(len(self.sc.sources))]
-        colors[1] = [hsv2rgb2hex(i * 360 / len(self.sc.sources), 70, 65) for i in range(len(self.sc.sources))]
-        colormap = []
-        ci = [False for _ in cats]
-        verts = []
-
-        for i in range(len(devices)):
-            for d in devices[i]:
-                v = [
-                    (d[0], cats[i] - .4),
-                    (d[0], cats[i] + .4),
-                    (d[1], cats[i] + .4),
-                    (d[1], cats[i] - .4),
-                    (d[0], cats[i] - .4),
-                ]
-                verts += [v]
-                colormap += [colors[ci[i]][d[2]]]
-                ci[i] = not ci[i]
-
-        bars = PolyCollection(verts, facecolors=colormap)
-        x.add_collection(bars)
-
-        x.set_title("Активность устройств")
-        x.set_yticks([i + 1 for i in range(len(self.dc.devices))])
-        x.set_yticklabels([i + 1 for i in range(len(self.dc.devices))])
-        x.set_ylim(0.5, len(self.dc.devices) + 0.5)
-        x.set_xlim(start, end)
-
-        return colors[0]
+    def graph_device(self, x, start=0, end=None):
+        return self.snapshot(start, end).graph_device(x)
 
     def graph_buffer(self, x, start=0, end=None):
-        if end is None:
-            end = self.backlog[-1][1]
-
-        accepted = ([], [])
-        changed = ([], [])
-        dropped = ([], [])
-        process_start = ([], [])
-        process_end = ([], [])
-
-        bound = 0
-        if not self.backlog_bounds:
-            if len(self.backlog) > 0:
-                self.backlog_bounds = [0, len(self.backlog)]
-            else:
-                return
-
-        i = self.backlog_bounds[0]
-        while i < self.backlog_bounds[1]:
-            if (self.backlog[i][1] < start - 5) or (self.backlog[i][1] > end):
-                if self.backlog[i][1] < max(0, start - 5):
-                    bound = i
-                i += 1
-                continue
-            self.backlog_bounds = [bound, len(self.backlog)]
-
-            num = int(self.backlog[i][0][1:]) + 1
-            if self.backlog[i][0][0] == 'B':
-                if self.backlog[i][2] == "Placed package.":
-                    accepted[0].append(self.backlog[i][1])
-                    accepted[1].append([num])
-                if self.backlog[i][2] == "Changed package.":
-                    changed[0].append(self.backlog[i][1])
-                    changed[1].append([num])
-                if self.backlog[i][2] == "Dropped package.":
-                    dropped[0].append(self.backlog[i][1])
-                    dropped[1].append([num])
-            if self.backlog[i][0][0] == 'D':
-                if self.backlog[i][2][1] == "Busy.":
-                    process_start[0].append(self.backlog[i][1])
-                    process_start[1].append([num])
-                if self.backlog[i][2][1] == "Ready.":
-                    process_end[0].append(self.backlog[i][1])
-                    process_end[1].append([num])
-
-            i += 1
-
-        x.scatter(*process_end, color='b', marker='v')
-        x.scatter(*process_start, color='b', marker='>')
-        x.scatter(*accepted, color='g', marker='o')
-        x.scatter(*dropped, color='r', marker='x')
-        x.scatter(*changed, color='y', marker='.')
-
-        x.set_title("События источников")
-        x.set_yticks([i + 1 for i in range(len(self.sc.sources))])
-        x.set_yticklabels([i + 1 for i in range(len(self.sc.sources))])
-        x.set_ylim(0.5, len(self.sc.sources) + 0.5)
-        x.set_xlim(start, end)
+        return self.snapshot(start, end).graph_buffer(x)
 
     def graph_queue(self, x, start=0, end=None):
-        if end is None:
-            end = self.backlog[-1][1]
-
-        a = ([], [])
-
-        bound = 0
-        if not self.backlog_bounds:
-            if len(self.backlog) > 0:
-                self.backlog_bounds = [0, len(self.backlog)]
-            else:
-                return
-
-        i = self.backlog_bounds[0]
-        while i < self.backlog_bounds[1]:
-            if (self.backlog[i][1] < start - 5) or (self.backlog[i][1] > end):
-                if self.backlog[i][1] < max(0, start - 5):
-                    bound = i
-                i += 1
-                continue
-            self.backlog_bounds = [bound, len(self.backlog)]
-
-            if self.backlog[i][0][0] == "Q":
-                a[0].append(self.backlog[i][1])
-                a[1].append(self.backlog[i][2])
-
-            i += 1
-
-        x.plot(*a)
-
-        x.set_title("Размер очереди по времени")
-        x.set_yticks([i + 1 for i in range(self.b.size)])
-        x.set_yticklabels([i + 1 for i in range(self.b.size)])
-        x.set_xlim(start, end)
-        x.set_ylim(0, self.b.size)
+        return self.snapshot(start, end).graph_queue(x)
 
     def matplotlib(self):
         fig = plt.figure()
@@ -233,52 +140,105 @@ class System:
 
     def push_to_device(self, device):
         package = self.b.pick(self.t)
-        self.save("Q0", len(self.b.queue))
+        self.save(Event.QUEUE, 0, len(self.b.queue))
         device.t = self.t
         if package:
             device.process(package)
+            self.dc.update(device)
             self.timings[self.dc] = next(self.dc)
-            self.save("D%s" % package[0].id, [device.id, "Busy."])
+            self.save(Event.BUSY, package.source.id, device.id)
         else:
             device.status = Status.HALT
+            self.dc.update(device)
             self.timings[self.dc] = next(self.dc)
+        return package
+
+    def finished(self):
+        return (self.sc.count() == self.limit) and not self.dc.busy()
+
+    def next_time(self):
+        if self.source_before_device() and self.sc.count() < self.limit:
+            return self.timings[self.sc][1]
+        return max(self.timings[self.dc][1], self.t)
+
+    def run_events(self, n=None):
+        done = 0
+        step = self.step
+        while self.running and (n is None or done < n):
+            if self.finished():
+                self.running = False
+                break
+            step()
+            done += 1
+        return done
+
+    def run_until(self, t):
+        done = 0
+        step = self.step
+        while self.running:
+            if self.finished():
+                self.running = False
+                break
+            if self.next_time() > t:
+                break
+            step()
+            done += 1
+        return done
 
     def tick(self):
-        if (self.sc.count() == self.limit) and not self.dc.list_working():
+        if self.finished():
             self.running = False
 
         if not self.running:
             return
 
-        if self.source_before_device() and self.sc.count() < self.limit:
-            s, self.t = self.timings[self.sc]
-            self.save("S%s" % s.id, "Generating.")
+        self.step()
 
-            drop, i = self.b.add(self.timings[self.sc])
-            if drop:
-                self.save("B%s" % s.id, "Placed package.")
-            else:
-                if i == -1:
-                    self.save("B%s" % s.id, "Dropped package.")
-                else:
-                    self.save("B%s" % i, "Dropped package.")
-                    self.save("B%s" % s.id, "Changed package.")
-            device = self.dc.select_free_device()
-            if device:
-                self.push_to_device(device)
-            self.timings[self.sc] = next(self.sc)
+    def step(self):
+        if self.source_before_device() and self.sc.count() < self.limit:
+            self.arrive()
+        else:
+            self.complete()
+
+    def arrive(self):
+        s, self.t = self.timings[self.sc]
+        self.save(Event.GENERATE, s.id)
+        self.enqueue(s)
+        self.dispatch()
+        self.timings[self.sc] = next(self.sc)
+
+    def enqueue(self, s):
+        drop, i = self.b.add(self.b.pool.acquire(s, self.t))
+        if drop:
+            self.save(Event.PLACE, s.id)
         else:
-            device, nt = self.timings[self.dc]
-            if nt > self.t:
-                self.t = nt
+            if i == -1:
+                self.save(Event.DROP, s.id)
             else:
-                device.t = self.t
-            if device.status == Status.BUSY:
-                package = device.package
-                device.end()
-                self.save("D%s" % package[0].id, [device.id, "Ready."])
+                self.save(Event.DROP, i)
+                self.save(Event.CHANGE, s.id)
+        return drop, i
+
+    def dispatch(self):
+        device = self.dc.select_free_device()
+        if device:
             self.push_to_device(device)
 
+    def complete(self):
+        device, nt = self.timings[self.dc]
+        if nt > self.t:
+            self.t = nt
+        else:
+            device.t = self.t
+        busy = device.status == Status.BUSY
+        if busy:
+            package = device.package
+            device.end()
+            self.save(Event.READY, package.source.id, device.id)
+            self.b.pool.release(package)
+        self.push_to_device(device)
+        return busy
+
     def acceptance_rate(self):
         return self.b.accepted / self.b.packages
 
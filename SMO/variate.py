@@ -0,0 +1,52 @@
+import numpy as np
+from numpy.random import Generator, PCG64, SeedSequence
+
+modes = (True, "inverse", "antithetic")
+top = np.nextafter(1.0, 0.0)
+
+
+class Variates:
+    def __init__(self, generator, draw, block=256):
+        self.generator = generator
+        self.draw = draw
+        self.block = block
+        self.values = iter(())
+
+    def __call__(self):
+        try:
+            return next(self.values)
+        except StopIteration:
+            self.values = iter(self.draw(self.generator, self.block).tolist())
+            return next(self.values)
+
+
+class Uniforms:
+    def __init__(self, generator, antithetic=False):
+        self.generator = generator
+        self.antithetic = antithetic
+
+    def random(self, n):
+        u = self.generator.random(n)
+        return 1.0 - u if self.antithetic else u
+
+    def exponential(self, scale, n):
+        return -scale * np.log1p(-np.minimum(self.random(n), top))
+
+    def gamma(self, shape, scale, n):
+        k = int(shape)
+        if k != shape:
+            raise ValueError("Inverse-transform streams only support integer gamma shapes")
+        return self.exponential(scale, (n, k)).sum(axis=1)
+
+
+def substreams(sequence, n, mode=True):
+    if mode not in modes:
+        raise ValueError("Unknown stream mode: %r" % (mode,))
+    generators = [Generator(PCG64(s)) for s in sequence.spawn(n)]
+    if mode is True:
+        return generators
+    return [Uniforms(g, mode == "antithetic") for g in generators]
+
+
+def entity_streams(seed):
+    return SeedSequence(seed).spawn(2)
@@ -0,0 +1,86 @@
+import queue
+import threading
+import time
+
+
+class Worker(threading.Thread):
+    def __init__(self, system, step=2, window=10, fps=60, rule=None):
+        super().__init__(daemon=True)
+        self.system = system
+        self.rule = rule
+        self.step = step
+        self.window = window
+        self.interval = 1 / fps
+        self.commands = queue.Queue()
+        self.snapshots = queue.Queue()
+        self.paused = True
+        self.t = 0.0
+        self.generation = 0
+        self.published = 0.0
+
+    def send(self, command, *args):
+        self.commands.put((command, args))
+
+    def snapshot(self):
+        start = max(0.0, self.t - self.window)
+        estimates = self.rule.estimates() if self.rule is not None else None
+        return self.system.snapshot(start, start + self.window, self.generation, estimates)
+
+    def publish(self):
+        self.published = time.perf_counter()
+        self.snapshots.put(self.snapshot())
+
+    def latest(self):
+        r = None
+        while True:
+            try:
+                r = self.snapshots.get_nowait()
+            except queue.Empty:
+                return r
+
+    def run(self):
+        self.publish()
+        while True:
+            busy = not self.paused and self.system.running
+            try:
+                command, args = self.commands.get(block=not busy)
+            except queue.Empty:
+                self.advance()
+                continue
+
+            if command == "stop":
+                return
+            getattr(self, "on_" + command)(*args)
+
+    def check(self):
+        if self.rule is not None and self.rule.update():
+            self.system.running = False
+
+    def advance(self):
+        self.system.run_until(self.t + self.step)
+        self.t += self.step
+        self.check()
+        if not self.system.running or time.perf_counter() - self.published >= self.interval:
+            self.publish()
+
+    def on_start(self):
+        self.paused = False
+
+    def on_pause(self):
+        self.paused = True
+        self.publish()
+
+    def on_step(self):
+        self.system.tick()
+        self.t = self.system.t
+        self.check()
+        self.publish()
+
+    def on_reset(self, limit):
+        self.paused = True
+        self.system.reset(limit)
+        if self.rule is not None:
+            self.rule.reset()
+        self.t = 0.0
+        self.generation += 1
+        self.publish()
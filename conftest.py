@@ -0,0 +1 @@
+# Keeps the SMO namespace package importable when pytest is run from any directory.
@@ -2,12 +2,16 @@ import tkinter as tk
 import tkinter.ttk
 import numpy as np
 import math
+import time
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 
+from SMO.renderer import Renderer
+from SMO.sequential import Sequential
 from SMO.system import System
+from SMO.worker import Worker
 
 
 class SMO(tk.Tk):
@@ -34,30 +38,32 @@ class SMO(tk.Tk):
 
 
 class SMOMainFrame(tk.Frame):
-    graph_t = 0.0
     graph_w = 10
     graph_step = 2
     graph_fps = 60
+    tree_fps = 10
+    tree_job = None
+    tree_time = 0.0
 
     loop_active = False
     loop_paused = True
 
     graph_page = 0
-    graph_drawer = None
 
     system_sources = 5
     system_buffer = 10
     system_devices = 56
-    system_limit = 0
+    system_limit = 1000000
+
+    estimate_precision = 0.1
+    estimate_level = 0.9
+    estimate_batch = 500
 
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
         self.system = None
 
-        self.shooting = ([None, 100], [None, None])
-        self.shooting_perc = 0
-
         # MATPLOTLIB CONTROLS
         frame = tk.Frame(self)
         frame.pack(side=tk.TOP, fill=tk.Y)
@@ -93,6 +99,7 @@ class SMOMainFrame(tk.Frame):
         self.f = Figure(figsize=(10, 5), dpi=100)
         self.f_canvas = FigureCanvasTkAgg(self.f, self)
         self.f_canvas.get_tk_widget().pack(side=tk.TOP)
+        self.renderer = Renderer(self.f, self.f_canvas)
 
         # SOURCES TREE VIEW
         frame = tk.Frame(self, height=150)
@@ -160,81 +167,85 @@ class SMOMainFrame(tk.Frame):
 
     def change_page(self, i):
         self.graph_page = i
-
-        if self.graph_page == 0:
-            self.graph_drawer = self.system.graph_device
-        if self.graph_page == 1:
-            self.graph_drawer = self.system.graph_buffer
-        if self.graph_page == 2:
-            self.graph_drawer = self.system.graph_queue
-
-        self.graph_draw(True)
+        self.renderer.set_page(i)
+        self.graph_draw()
 
     def prepare_system(self):
         self.btn_devices["state"] = tk.NORMAL
         self.btn_sources["state"] = tk.NORMAL
         self.btn_queue["state"] = tk.NORMAL
 
-        self.graph_t = 0.0
         self.system = System(self.system_sources, self.system_buffer, self.system_devices)
-        self.system.reset(100)
-        self.change_page(self.graph_page)
-
-    def reset(self):
-        self.graph_t = 0.0
-        self.system.reset(self.shooting[0][1])
-        self.controller.wm_title("%s | Target: %s (%.2f%%)" % (
-            self.controller.title,
-            self.shooting[0][1],
-            self.shooting_perc
-        ))
+        self.system.fast_forward = True
+        self.system.reset(self.system_limit)
 
+        rule = Sequential(
+            self.system, ("drop_rate",), self.estimate_precision, self.estimate_level, self.estimate_batch
+        )
+        self.worker = Worker(self.system, self.graph_step, self.graph_w, self.graph_fps, rule)
+        self.snapshot = self.worker.snapshot()
+        self.create_tree()
+        self.change_page(self.graph_page)
+        self.worker.start()
+        self.after(0, self.poll)
 
-    def update_tree(self):
-        generated = self.system.sc.list_count()
-        generated = [sum(generated)] + generated
-        drop_rate = self.system.sc.list_dropped_rate()
-        drop_rate = [sum(drop_rate) / self.system_sources] + drop_rate
-        avg_system = self.system.sc.list_system_time()
-        avg_system = [sum(avg_system) / self.system_sources] + avg_system
-        avg_buffer = self.system.sc.list_buffer_time()
-        avg_buffer = [sum(avg_buffer) / self.system_sources] + avg_buffer
-        sig_buffer = self.system.sc.list_buffer_time_dispersion()
-        sig_buffer = [sum(sig_buffer) / self.system_sources] + sig_buffer
-        avg_processing = self.system.sc.list_processing_time()
-        avg_processing = [sum(avg_processing) / self.system_sources] + avg_processing
-        sig_processing = self.system.sc.list_processing_time_dispersion()
-        sig_processing = [sum(sig_processing) / self.system_sources] + sig_processing
-
+    def create_tree(self):
         self.tree_sources.delete(*self.tree_sources.get_children())
         for i in range(self.system_sources + 1):
-            values = (
-                generated[i],
-                "%.5f%%" % (drop_rate[i] * 100),
-                "%.5f" % avg_system[i],
-                "%.5f" % avg_buffer[i],
-                "%.5f" % sig_buffer[i],
-                "%.5f" % avg_processing[i],
-                "%.5f" % sig_processing[i]
-            )
-            self.tree_sources.insert('', 'end', 'source%s' % i, text=(i if i > 0 else "A"), values=values)
-
-        proceeded = self.system.dc.list_proceeded()
-        proceeded = [sum(proceeded)] + proceeded
-        pointer = [''] + self.system.dc.list_pointer()
-        status = [''] + self.system.dc.list_status()
-        usage_rate = self.system.dc.list_work_rate()
-        usage_rate = [sum(usage_rate) / self.system_devices] + usage_rate
+            self.tree_sources.insert('', 'end', 'source%s' % i, text=(i if i > 0 else "A"))
 
         self.tree_devices.delete(*self.tree_devices.get_children())
         for i in range(self.system_devices + 1):
-            values = (
-                proceeded[i],
-                pointer[i],
-                status[i],
-                "%.5f%%" % (usage_rate[i] * 100)
-            )
-            self.tree_devices.insert('', 'end', 'device%s' % i, text=(i if i > 0 else "A"), values=values)
+            self.tree_devices.insert('', 'end', 'device%s' % i, text=(i if i > 0 else "A"))
+
+        self.tree_rows = {}
+        self.update_tree()
+
+    def set_tree_rows(self, tree, prefix, rows, format):
+        for i, row in enumerate(rows):
+            iid = '%s%s' % (prefix, i)
+            if self.tree_rows.get(iid) != row:
+                self.tree_rows[iid] = row
+                tree.item(iid, values=format(*row))
+
+    def source_values(self, generated, drop_rate, avg_system, avg_buffer, sig_buffer, avg_processing, sig_processing):
+        return (
+            generated,
+            "%.5f%%" % (drop_rate * 100),
+            "%.5f" % avg_system,
+            "%.5f" % avg_buffer,
+            "%.5f" % sig_buffer,
+            "%.5f" % avg_processing,
+            "%.5f" % sig_processing
+        )
+
+    def device_values(self, proceeded, pointer, status, usage_rate):
+        return (
+            proceeded,
+            pointer,
+            status,
+            "%.5f%%" % (usage_rate * 100)
+        )
+
+    def update_tree(self):
+        snapshot = self.snapshot
+        self.set_tree_rows(
+            self.tree_sources, 'source', (snapshot.source_total,) + snapshot.source_rows, self.source_values
+        )
+        self.set_tree_rows(
+            self.tree_devices, 'device', (snapshot.device_total,) + snapshot.device_rows, self.device_values
+        )
+
+    def schedule_tree(self):
+        if self.tree_job is not None:
+            return
+        delay = self.tree_time + 1 / self.tree_fps - time.perf_counter()
+        self.tree_job = self.after(max(0, math.ceil(delay * 1000)), self.refresh_tree)
+
+    def refresh_tree(self):
+        self.tree_job = None
+        self.tree_time = time.perf_counter()
+        self.update_tree()
 
     def btn_start_action(self):
         self.btn_start["state"] = tk.DISABLED
@@ -243,81 +254,55 @@ class SMOMainFrame(tk.Frame):
         self.btn_reset["state"] = tk.DISABLED
         self.loop_active = True
         self.loop_paused = False
-        self.loops_kickstart()
+        self.worker.send("start")
 
     def btn_pause_action(self):
         self.loop_paused = not self.loop_paused
         self.btn_step["state"] = tk.NORMAL if self.loop_paused else tk.DISABLED
         self.btn_reset["state"] = tk.NORMAL if self.loop_paused else tk.DISABLED
-        if not self.loop_paused:
-            self.loops_kickstart()
+        self.worker.send("pause" if self.loop_paused else "start")
 
     def btn_step_action(self):
-        self.system_tick()
-        self.graph_t = self.system.t
-        self.graph_draw()
+        self.worker.send("step")
 
     def btn_reset_action(self):
-        self.controller.create_frame()
-        self.pack_forget()
+        self.loop_active = False
+        self.loop_paused = True
+        self.btn_start["state"] = tk.NORMAL
+        self.btn_pause["state"] = tk.DISABLED
+        self.btn_step["state"] = tk.NORMAL
+        self.controller.wm_title(self.controller.title)
+        self.worker.send("reset", self.system_limit)
+
+    def poll(self):
+        if not self.worker.is_alive():
+            return
 
-    def loops_kickstart(self):
-        self.after(0, self.system_loop)
-        self.after(0, self.graph_draw)
+        snapshot = self.worker.latest()
+        if snapshot is not None:
+            self.snapshot = snapshot
+            self.graph_draw()
+            self.schedule_tree()
+            if self.loop_active and not snapshot.running:
+                self.system_finished()
 
-    def system_tick(self):
-        self.system.tick()
-        self.update_tree()
+        self.after(math.floor(1000 / self.graph_fps), self.poll)
 
-    def system_loop(self):
-        if not self.loop_active:
-            return
+    def system_finished(self):
+        self.loop_active = False
+        e = self.snapshot.estimates["drop_rate"]
+        self.controller.wm_title("%s | Result: %s (%.2f%% ± %.2f%%)" % (
+            self.controller.title,
+            self.snapshot.source_total[0],
+            e.mean * 100,
+            e.half_width() * 100
+        ))
+
+        self.btn_pause["state"] = tk.DISABLED
+        self.btn_reset["state"] = tk.NORMAL
 
-        while self.system.running:
-            self.system_tick()
-            if self.system.t < (self.graph_t + self.graph_step):
-                continue
-            self.graph_t += self.graph_step
-            break
-
-        self.loop_active = self.system.running
-        if not self.loop_active:
-            self.shooting[1][1] = self.system.sc.dropped_rate()
-            if not self.shooting[1][0] is None:
-                delta = math.fabs(self.shooting[1][1] - self.shooting[1][0])
-                self.shooting_perc = delta / self.shooting[1][0] * 100 if self.shooting[1][0] > 0 else 0
-                print(self.shooting_perc, self.shooting[1])
-                if self.shooting_perc > 10.0:
-                    self.loop_active = True
-                else:
-                    self.controller.wm_title("%s | Result: %s (%.2f%%)" % (
-                        self.controller.title,
-                        min(self.shooting[0]),
-                        self.shooting_perc
-                    ))
-            else:
-                self.loop_active = True
-
-            self.shooting[1][0] = self.shooting[1][1]
-            self.shooting[0][0] = self.shooting[0][1]
-            self.shooting[0][1] = math.ceil((1.645**2 * (1 - self.shooting[1][0]))/(self.shooting[1][0] * 0.01)) if self.shooting[1][0] > 0 else 0
-            if self.loop_active and self.shooting[0][1] != 0:
-                self.reset()
-
-            self.btn_pause["state"] = tk.NORMAL if self.loop_active else tk.DISABLED
-            self.btn_reset["state"] = tk.DISABLED if self.loop_active else tk.NORMAL
-
-        if self.loop_active and not self.loop_paused:
-            self.after(10, self.system_loop)
-
-    def graph_draw(self, refresh=False):
-        start = max(0.0, self.graph_t - self.graph_w)
-        self.f.clf()
-        x = self.f.add_subplot(111)
-        self.graph_drawer(x, start=start, end=(start + self.graph_w))
-        self.f_canvas.draw()
-        if self.loop_active and not self.loop_paused and not refresh:
-            self.after(math.floor(1000 / self.graph_fps), self.graph_draw)
+    def graph_draw(self):
+        self.renderer.draw(self.snapshot)
 
 
 app = SMO()
@@ -0,0 +1,79 @@
+import random
+
+import pytest
+
+from SMO.buffer import Buffer
+from SMO.source import Source
+
+
+class Reference:
+    # The original ring-walk buffer: evict the lowest source id at or after the
+    # pointer, serve every waiting package of the highest source id in slot order.
+    def __init__(self, size):
+        self.data = [None] * size
+        self.queue = []
+        self.pointer = 0
+
+    def add(self, id):
+        for i, r in enumerate(self.data):
+            if r is None:
+                self.data[i] = [id, False]
+                return True, id
+
+        low = min(r[0] for r in self.data)
+        size = len(self.data)
+        for k in range(size):
+            i = (self.pointer + k) % size
+            if self.data[i][0] == low and not self.data[i][1]:
+                self.pointer = i
+                self.data[i] = [id, False]
+                return False, low
+        return False, -1
+
+    def pick(self):
+        if not self.queue:
+            ids = [r[0] for r in self.data if r is not None]
+            if not ids:
+                return None
+            high = max(ids)
+            self.queue = [i for i, r in enumerate(self.data) if r is not None and r[0] == high]
+            for i in self.queue:
+                self.data[i][1] = True
+        i = self.queue.pop(0)
+        id = self.data[i][0]
+        self.data[i] = None
+        return id
+
+
+def layout(b):
+    return [(r.source.id, r.queued) if r else None for r in b.data]
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("size", [1, 3, 8])
+def test_evict_and_serve_order(seed, size):
+    rng = random.Random(seed)
+    sources = [Source(i) for i in range(6)]
+    b = Buffer(size)
+    reference = Reference(size)
+
+    for step in range(2000):
+        if rng.random() < 0.6:
+            id = rng.randrange(len(sources))
+            assert b.add(b.pool.acquire(sources[id], float(step))) == reference.add(id)
+            assert b.pointer == reference.pointer
+        else:
+            r = b.pick(float(step))
+            assert (r.source.id if r else None) == reference.pick()
+            if r:
+                b.pool.release(r)
+        assert layout(b) == [tuple(r) if r else None for r in reference.data]
+
+
+def test_counters():
+    sources = [Source(0), Source(1)]
+    b = Buffer(2)
+    for i in range(4):
+        b.add(b.pool.acquire(sources[i % 2], float(i)))
+    assert (b.packages, b.accepted, b.dropped) == (4, 4, 2)
+    assert sources[0].dropped == 2
@@ -0,0 +1,65 @@
+import pytest
+
+from SMO import checkpoint, kernel
+from SMO.system import System
+
+
+def build(streams):
+    system = System(5, 10, 8, seed=5, streams=streams, quantiles=(0.5, 0.95))
+    system.logging = False
+    system.fast_forward = True
+    system.reset(5000)
+    return system
+
+
+def metrics(system):
+    return (
+        system.t,
+        system.sc.dropped_rate(),
+        system.sc.list_system_time(),
+        system.sc.list_system_time_quantile(0.95),
+        system.dc.list_work_rate(),
+        system.dc.list_proceeded(),
+    )
+
+
+def test_loads_rejects_other_data():
+    with pytest.raises(ValueError):
+        checkpoint.loads(b"not a checkpoint")
+
+
+@pytest.mark.parametrize("streams", [False, True])
+def test_resume_matches_uninterrupted_run(streams):
+    system = build(streams)
+    events = system.run_events(4000)
+    data = checkpoint.dumps(system)
+    events += system.run_events()
+    expected = metrics(system)
+
+    resumed = checkpoint.loads(data)
+    assert resumed.run_events() + 4000 == events
+    assert metrics(resumed) == expected
+
+
+def test_kernel_resume_matches_uninterrupted_run():
+    system = build(True)
+    events = kernel.execute(system, 4000)
+    data = checkpoint.dumps(system)
+    events += kernel.execute(system)
+    expected = metrics(system)
+
+    resumed = checkpoint.loads(data)
+    assert kernel.execute(resumed) + 4000 == events
+    assert metrics(resumed) == expected
+
+
+def test_save_and_load(tmp_path):
+    system = build(False)
+    system.run_events(1000)
+    path = str(tmp_path / "run.ckpt")
+    checkpoint.save(system, path)
+    system.run_events()
+
+    resumed = checkpoint.load(path)
+    resumed.run_events()
+    assert metrics(resumed) == metrics(system)
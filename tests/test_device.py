@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+from SMO.device import DeviceController, ReadySet, Status
+
+
+def ring_walk(dc):
+    size = len(dc.devices)
+    for k in range(size):
+        d = dc.devices[(dc.pointer + k) % size]
+        if d.status != Status.BUSY:
+            return d
+    return None
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 56, 130])
+def test_select_free_device_matches_ring_walk(size):
+    rng = random.Random(size)
+    dc = DeviceController(size)
+    for n in range(3000):
+        d = dc.devices[rng.randrange(size)]
+        d.status = rng.choice((Status.BUSY, Status.READY, Status.HALT))
+        d.eta = d.t + 1.0
+        dc.update(d)
+        if rng.random() < 0.3:
+            dc.pointer = rng.randrange(size)
+
+        expected = ring_walk(dc)
+        pointer = dc.pointer
+        assert dc.select_free_device() is expected
+        assert dc.pointer == (expected.id if expected else pointer)
+        assert dc.busy() == sum(d.status == Status.BUSY for d in dc.devices)
+
+
+def test_ready_set():
+    ready = ReadySet(10)
+    assert ready.next(0) == -1
+    for i in (2, 5, 7):
+        ready.add(i)
+    ready.add(5)
+    assert len(ready) == 3
+    assert [ready.next(i) for i in (0, 3, 5, 6, 8)] == [2, 5, 5, 7, 2]
+    ready.discard(2)
+    ready.discard(2)
+    assert len(ready) == 2 and 2 not in ready and 7 in ready
+    assert ready.next(0) == 5
@@ -0,0 +1,33 @@
+import pytest
+
+from SMO import distribution
+from SMO.system import System
+
+configs = [(5, 10, 56), (10, 5, 3), (3, 2, 2), (1, 1, 1)]
+
+
+def run(config, fast_forward, **kwargs):
+    system = System(*config, seed=3, **kwargs)
+    system.logging = False
+    system.fast_forward = fast_forward
+    system.reset(3000)
+    system.run_events()
+    return (
+        system.t,
+        system.b.dropped,
+        system.sc.dropped_rate(),
+        system.sc.list_system_time(),
+        system.dc.list_work_rate(),
+        system.dc.list_proceeded(),
+    )
+
+
+@pytest.mark.parametrize("config", configs)
+def test_fast_forward_metrics(config):
+    assert run(config, True) == run(config, False)
+
+
+@pytest.mark.parametrize("config", configs)
+def test_fast_forward_metrics_with_distributions(config):
+    kwargs = dict(interval=distribution.parse("exp:0.3"), service=distribution.parse("erlang:2,0.8"))
+    assert run(config, True, **kwargs) == run(config, False, **kwargs)
@@ -0,0 +1,62 @@
+import pytest
+
+from SMO import distribution, kernel
+from SMO.system import System
+
+services = [None, "exp:0.8", "erlang:2,0.8", "hyperexp:0.3,0.2,0.7,1.2", "det:0.6"]
+
+
+def build(service, streams, fast_forward):
+    kwargs = {} if service is None else dict(interval=distribution.parse("exp:0.3"), service=distribution.parse(service))
+    system = System(6, 8, 4, seed=11, streams=streams, **kwargs)
+    system.logging = False
+    system.fast_forward = fast_forward
+    system.reset(3000)
+    return system
+
+
+def metrics(system):
+    return (
+        system.t,
+        system.sc.dropped_rate(),
+        system.sc.list_system_time(),
+        system.dc.list_work_rate(),
+        system.dc.list_proceeded(),
+        [s.count for s in system.sc.sources],
+    )
+
+
+@pytest.mark.parametrize("fast_forward", [True, False])
+@pytest.mark.parametrize("streams", [True, "inverse", "antithetic"])
+@pytest.mark.parametrize("service", services)
+def test_kernel_matches_python(service, streams, fast_forward):
+    a = build(service, streams, fast_forward)
+    b = build(service, streams, fast_forward)
+    assert kernel.supported(b) or not kernel.available()
+
+    events = a.run_events()
+    assert kernel.execute(b) == events
+    assert not b.running
+    assert metrics(b) == metrics(a)
+
+
+def test_kernel_resumes_in_chunks():
+    a = build("erlang:2,0.8", True, True)
+    b = build("erlang:2,0.8", True, True)
+
+    events = a.run_events()
+    done = 0
+    while b.running:
+        done += kernel.execute(b, 997)
+    assert done == events
+    assert metrics(b) == metrics(a)
+
+
+def test_reason():
+    system = build(None, False, True)
+    assert kernel.reason(system) is not None
+    assert kernel.run_events(system) > 0
+
+    system = build(None, True, True)
+    system.logging = True
+    assert kernel.reason(system) == ("the event log is enabled" if kernel.available() else "numba is not installed")
@@ -0,0 +1,53 @@
+import random
+
+from SMO.schedule import Schedule
+
+
+def drain(schedule):
+    r = []
+    while schedule:
+        r.append(schedule.pop()[0])
+    return r
+
+
+def test_order_by_time_rank_and_insertion():
+    schedule = Schedule()
+    schedule.push("c", 1.0, 1)
+    schedule.push("a", 1.0, 0)
+    schedule.push("d", 1.0, 1)
+    schedule.push("b", 0.5, 9)
+    assert schedule.peek() == ("b", 0.5)
+    assert drain(schedule) == ["b", "a", "c", "d"]
+
+
+def test_push_replaces_and_remove_drops():
+    schedule = Schedule()
+    schedule.push("a", 1.0)
+    schedule.push("b", 2.0)
+    schedule.push("a", 3.0)
+    schedule.push("c", 0.0)
+    schedule.remove("c")
+    assert len(schedule) == 2
+    assert "c" not in schedule
+    assert drain(schedule) == ["b", "a"]
+    assert schedule.peek() is None
+
+
+def test_random_against_sorted():
+    rng = random.Random(7)
+    schedule = Schedule()
+    entries = {}
+    for n in range(5000):
+        item = rng.randrange(50)
+        if rng.random() < 0.2:
+            schedule.remove(item)
+            entries.pop(item, None)
+        else:
+            t, rank = rng.randrange(20) / 4.0, rng.randrange(3)
+            schedule.push(item, t, rank)
+            entries[item] = (t, rank, n)
+        if entries:
+            first = min(entries, key=entries.get)
+            assert schedule.peek() == (first, entries[first][0])
+        else:
+            assert schedule.peek() is None
@@ -0,0 +1,51 @@
+import math
+import random
+
+import pytest
+
+from SMO.stats import Statistic, mser, t_quantile
+
+
+@pytest.mark.parametrize("p, df, expected", [
+    (0.95, 1, 6.313752), (0.95, 5, 2.015048), (0.975, 10, 2.228139), (0.995, 30, 2.749996), (0.9, 1000, 1.282399),
+])
+def test_t_quantile(p, df, expected):
+    assert t_quantile(p, df) == pytest.approx(expected, abs=1e-6)
+    assert t_quantile(1 - p, df) == pytest.approx(-expected, abs=1e-6)
+
+
+def test_truncate_keeps_only_later_observations():
+    rng = random.Random(1)
+    values = [rng.expovariate(1.0) for _ in range(1000)]
+    s = Statistic(histogram=(0.0, 10.0, 20))
+    tail = Statistic(histogram=(0.0, 10.0, 20))
+    for x in values[:300]:
+        s.add(x)
+    state = s.state()
+    for x in values[300:]:
+        s.add(x)
+        tail.add(x)
+    s.truncate(state)
+
+    assert s.n == tail.n
+    assert s.mean == pytest.approx(tail.mean)
+    assert s.variance() == pytest.approx(tail.variance())
+    assert s.histogram.counts == tail.histogram.counts
+
+
+def test_truncate_drops_sketches():
+    s = Statistic(quantiles=(0.5,))
+    for i in range(100):
+        s.add(float(i))
+    state = s.state()
+    s.add(1.0)
+    s.truncate(state)
+    assert math.isnan(s.quantile(0.5))
+
+
+def test_mser_ignores_a_large_offset():
+    rng = random.Random(2)
+    values = [50.0 - i / 2.0 + rng.random() for i in range(100)] + [rng.random() for _ in range(900)]
+    d = mser(values)
+    assert d is not None and d >= 100
+    assert mser([1e8 + x for x in values]) == d